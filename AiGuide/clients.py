@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import time
+from openai import AsyncOpenAI
+from decouple import config
+from django.conf import settings
+from Places.quota import acquire_upstream_quota_async
+
+logger = logging.getLogger(__name__)
+
+# one openai client per worker process, shared by every websocket instead of built on each connect
+_client = None
+
+# the assistant's metadata changes only when someone edits it on openai, refetched every OPENAI_ASSISTANT_CACHE_TTL
+_assistant = None
+_assistant_expires_at = 0.0
+_assistant_lock = None
+
+
+def get_openai_client() -> AsyncOpenAI:
+    """Shared async openai client, its connection pool is kept alive across websockets."""
+    global _client
+
+    # consumers all run on the process's event loop, so no lock is needed here
+    if _client is None:
+        _client = AsyncOpenAI(api_key=config("OPENAI_API_KEY"))
+    return _client
+
+
+async def get_assistant():
+    """The ai guide assistant, retrieved at most once per OPENAI_ASSISTANT_CACHE_TTL per process."""
+    global _assistant, _assistant_expires_at, _assistant_lock
+
+    if _assistant is not None and time.monotonic() < _assistant_expires_at:
+        return _assistant
+
+    if _assistant_lock is None:
+        _assistant_lock = asyncio.Lock()
+
+    # one refresh at a time, every other consumer waits for it instead of retrieving the assistant too
+    async with _assistant_lock:
+        if _assistant is not None and time.monotonic() < _assistant_expires_at:
+            return _assistant
+
+        try:
+            await acquire_upstream_quota_async("llm")
+            _assistant = await get_openai_client().beta.assistants.retrieve(
+                assistant_id=config('OPENAI_ASSISTANT_ID'),
+            )
+        except Exception:
+            if _assistant is None:
+                raise
+            # keep answering with the metadata we have, try again after another ttl
+            logger.warning("Refreshing the ai guide assistant failed, keeping the cached one", exc_info=True)
+
+        _assistant_expires_at = time.monotonic() + settings.OPENAI_ASSISTANT_CACHE_TTL
+    return _assistant
+
+
+async def reset_clients():
+    """Close the shared client and forget the assistant, the next call builds them again from the current settings."""
+    global _client, _assistant, _assistant_expires_at, _assistant_lock
+
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _assistant = None
+    _assistant_expires_at = 0.0
+    # a lock that has been waited on is bound to its event loop, the caller may be on another one
+    _assistant_lock = None
@@ -1,27 +1,53 @@
+import asyncio
 import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
 from channels.generic.websocket import AsyncWebsocketConsumer
-from openai import OpenAI
-from decouple import config
+from openai import NotFoundError, OpenAIError
 from channels.db import database_sync_to_async
-from decouple import config
+from django.conf import settings
 from .models import Thread
+from .clients import get_openai_client, get_assistant
+from .keywords import get_local_keywords, cache_extracted_keywords
+from .timings import StageTimer
 from Places.utils import Feed
+from Places.quota import acquire_upstream_quota_async
+from Places.deadlines import request_deadline
+from Places.exceptions import UpstreamQuotaExhausted
 from Places.models import City
 
+logger = logging.getLogger(__name__)
+
+# the Feed is synchronous (caches, catalog queries, pooled google clients), it runs here so it never blocks the event loop
+_feed_executor = ThreadPoolExecutor(max_workers=settings.AI_GUIDE_FEED_WORKERS, thread_name_prefix="ai-guide-feed")
+
+
+def get_places_for_ai_request(city_name, city_location, extracted_search_interests_from_message):
+    return Feed().get_places_from_google_maps_for_ai_request(
+        city_name=city_name,
+        city_location=city_location,
+        extracted_search_interests_from_message=extracted_search_interests_from_message
+    )
+
+
 class EuroTripAiConsumer(AsyncWebsocketConsumer):
     async def connect(self):
 
-        # initialise open ai and the assistants 
-        self.client = OpenAI(
-            api_key=config("OPENAI_API_KEY") 
-        )
+        # the openai client and assistant are shared by every consumer in the process
+        self.client = get_openai_client()
+        self.assistant = None
+        self.thread = None
+
+        # thread naming and database saves run after the answer is sent, disconnect waits for them
+        self.background_tasks = set()
+        self.pending_save = None
         
         self.user_id = self.scope['url_route']['kwargs']['user_id']
         self.current_city_name = self.scope['url_route']['kwargs']['city_name']
         
         try:
+            # the thread itself is looked up on the first message, connecting never waits on openai
             self.thread_id = self.scope['url_route']['kwargs']['thread_id']
-            self.thread = self.client.beta.threads.retrieve(thread_id=self.thread_id)
             
             await self.set_current_city_name_and_location()
 
@@ -34,14 +60,38 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
         await self.channel_layer.group_add(self.room_name, self.channel_name)
         await self.accept()
 
-        self.assistant = self.client.beta.assistants.retrieve(
-            assistant_id = config('OPENAI_ASSISTANT_ID'),
-        )
-
     async def disconnect(self, close_code):
         await self.channel_layer.group_discard(self.room_name, self.channel_name)
 
-    def generate_thread_name(self, message):
+        # the conversation is only in the database once the pending saves are done
+        if self.background_tasks:
+            await asyncio.wait(list(self.background_tasks))
+
+    def run_in_background(self, coroutine):
+
+        task = asyncio.create_task(coroutine)
+        self.background_tasks.add(task)
+        task.add_done_callback(self.background_task_done)
+        return task
+
+    def background_task_done(self, task):
+
+        self.background_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error("AI guide background task failed", exc_info=task.exception())
+
+    def save_in_background(self, coroutine):
+
+        # saves run one after another, the thread row exists before its messages and messages keep their order
+        self.pending_save = self.run_in_background(self.save_after(self.pending_save, coroutine))
+
+    async def save_after(self, previous_save, coroutine):
+
+        if previous_save is not None:
+            await asyncio.wait([previous_save])
+        await coroutine
+
+    async def generate_thread_name(self, message):
 
         instruction = f"""
         You are an assistant that generates a concise and catchy 
@@ -58,14 +108,33 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
         {message}
         """
 
-        response = self.client.responses.create(
+        await acquire_upstream_quota_async("llm")
+        response = await self.client.responses.create(
             model="gpt-4o-mini",
             input=instruction
         )
 
         return response.output_text.strip('"')
 
-    def extract_google_places_searchable_keywords_from_user_message(self, message):
+    async def extract_google_places_searchable_keywords_from_user_message(self, message):
+
+        # categories, synonyms and city names are matched locally, the llm only sees messages we don't understand
+        local_keywords = await database_sync_to_async(get_local_keywords, thread_sensitive=False)(message)
+        if local_keywords.is_confident:
+            return local_keywords.keywords
+
+        try:
+            keywords = await self.extract_keywords_with_llm(message)
+        except (UpstreamQuotaExhausted, OpenAIError):
+            # whatever we matched locally beats no places at all
+            if not local_keywords.keywords:
+                raise
+            return local_keywords.keywords
+
+        await database_sync_to_async(cache_extracted_keywords, thread_sensitive=False)(message, keywords)
+        return keywords
+
+    async def extract_keywords_with_llm(self, message):
 
         instruction = f"""
         You are an assistant designed to extract relevant and concise 
@@ -87,31 +156,64 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
         {message}
         """
 
-        response = self.client.responses.create(
+        await acquire_upstream_quota_async("llm")
+        response = await self.client.responses.create(
             model="gpt-4o-mini",
             input=instruction
         )
 
-        return response.output_text.strip('"').split(',')
+        keywords = [keyword.strip() for keyword in response.output_text.strip('"').split(',')]
+        return [keyword for keyword in keywords if keyword]
 
-    async def create_new_open_ai_thread(self, message):
+    async def create_new_open_ai_thread(self, message, timer):
 
-        self.thread = self.client.beta.threads.create()
+        await acquire_upstream_quota_async("llm")
+        self.thread = await self.client.beta.threads.create()
         self.thread_id = self.thread.id
 
+        # the answer doesn't need the thread's name, it is generated and saved after the fact
+        self.save_in_background(timer.time("save_thread", self.save_new_thread_in_database(self.thread_id, message)))
+
+    async def save_new_thread_in_database(self, thread_id, message):
+
+        try:
+            thread_name = await self.generate_thread_name(message)
+        except (UpstreamQuotaExhausted, OpenAIError):
+            # a chat without a generated name is still worth keeping
+            thread_name = message[:100]
+
         await self.create_new_user_thread_in_database(
-            thread_id = self.thread_id,
-            thread_name = self.generate_thread_name(message)
+            thread_id = thread_id,
+            thread_name = thread_name
         )
 
-    async def get_places_based_on_user_message(self, message):
+    async def resolve_open_ai_thread(self):
+
+        # resumed threads are retrieved once, on the first message of the connection
+        if self.thread is not None or self.thread_id is None:
+            return
+
+        await acquire_upstream_quota_async("llm")
+        try:
+            self.thread = await self.client.beta.threads.retrieve(thread_id=self.thread_id)
+        except NotFoundError:
+            # the thread is gone on openai, carry on in a new one
+            self.thread_id = None
+
+    async def get_places_based_on_user_message(self, message, timer):
         
-        places = Feed().get_places_from_google_maps_for_ai_request(
-            city_name = self.current_city_name,
-            city_location = self.current_city_location,
-            extracted_search_interests_from_message = self.extract_google_places_searchable_keywords_from_user_message(message)
+        extracted_search_interests_from_message = await timer.time(
+            "keywords", self.extract_google_places_searchable_keywords_from_user_message(message)
         )
 
+        # same budget for google as an http request gets from UpstreamDeadlineMiddleware
+        with request_deadline(settings.UPSTREAM_REQUEST_DEADLINE):
+            places = await timer.time("places", database_sync_to_async(get_places_for_ai_request, thread_sensitive=False, executor=_feed_executor)(
+                city_name = self.current_city_name,
+                city_location = self.current_city_location,
+                extracted_search_interests_from_message = extracted_search_interests_from_message
+            ))
+
         return places
     
     async def receive(self, text_data):
@@ -120,37 +222,60 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
         payload = json.loads(text_data)
         message = payload.get('message')
 
-        # If thread_id is not provided, create a new thread
+        # opt in to {"type": "delta"} messages while the assistant is still writing its answer
+        stream = bool(payload.get('stream', False))
+
+        timer = StageTimer()
+        try:
+            await self.respond_to_user_message(message, timer, stream=stream)
+        except (UpstreamQuotaExhausted, OpenAIError) as error:
+            # the outbound quota is exhausted or openai failed, answer like an unavailable assistant instead of
+            # dropping the socket
+            if isinstance(error, OpenAIError):
+                logger.warning("AI guide turn failed on openai", exc_info=True)
+            await self.send_unavailable_message()
+        finally:
+            timer.finish()
+
+    async def respond_to_user_message(self, message, timer, stream=False):
+
+        # none of these depend on each other, a new chat also still needs its city before the places lookup
+        setup = [
+            timer.time("resolve_thread", self.resolve_open_ai_thread()),
+            # served from the process cache, asked again per message so long connections pick up refreshes
+            timer.time("assistant", get_assistant()),
+        ]
+        if self.thread_id == None:
+            setup.append(timer.time("city", self.set_current_city_name_and_location()))
+        _, self.assistant, *_ = await asyncio.gather(*setup)
+
+        places_lookup = self.get_places_based_on_user_message(message, timer)
+
+        # If thread_id is not provided, create a new thread while the places are looked up
         if (len(message) > 0) and (self.thread_id == None):
-            
-            await self.create_new_open_ai_thread(message)
-            await self.set_current_city_name_and_location()
-        
-        places = await self.get_places_based_on_user_message(message)
+            _, places = await asyncio.gather(
+                timer.time("create_thread", self.create_new_open_ai_thread(message, timer)),
+                places_lookup,
+            )
+        else:
+            places = await places_lookup
         
         # create a new message to be sent to openai
-        self.client.beta.threads.messages.create(
+        await acquire_upstream_quota_async("llm")
+        await timer.time("add_message", self.client.beta.threads.messages.create(
             thread_id=self.thread.id,
             role="user",
             content=json.dumps(places, indent=4)
-        )
-
-        # run the assistant and poll the responses from ai
-        run = self.client.beta.threads.runs.create_and_poll(
-            thread_id=self.thread.id,
-            assistant_id=self.assistant.id,
-        )
+        ))
 
-        if run.status == 'completed': 
-
-            # grab the last message sent in the thread (which is the AI's message)
-            ai_message = self.client.beta.threads.messages.list(
-                thread_id=self.thread.id,
-                limit=1,
-                order='desc'
-            )
+        # run the assistant, either streaming its answer to the socket or polling until it is done
+        await acquire_upstream_quota_async("llm")
+        if stream:
+            run, ai_response = await timer.time("run", self.run_assistant_streaming())
+        else:
+            run, ai_response = await timer.time("run", self.run_assistant())
 
-            ai_response = ai_message.data[0].content[0].text.value
+        if run.status == 'completed' and ai_response is not None: 
 
             # parse the AI response to a JSON object if it is a string
             # This is to ensure that the response is in a valid JSON format
@@ -160,7 +285,8 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
                     ai_response = json.loads(ai_response)
                     ai_response = await self.construct_ai_response(places, ai_response)
                 except json.JSONDecodeError:
-                    print("Error: Invalid AI response format.")
+                    logger.warning("AI guide answer is not valid JSON: %.200s", ai_response)
+                    await self.send_unavailable_message()
                     return
            
             # send message back to client
@@ -172,21 +298,49 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
             # call event to send message to client
             await self.channel_layer.group_send(self.room_name, event)
 
-            # save this message/response to the database as a new user thread message
-            await self.save_user_message_to_a_new_thread_message_in_database(user_message={"message": message})
-            
-            # save this message/response to the database as a new ai guide thread message
-            await self.save_ai_response_to_a_new_thread_message_in_database(ai_response)
+            # the client has its answer, saving it doesn't hold up the next message
+            self.save_in_background(timer.time("save_messages", self.save_messages_in_database(message, ai_response)))
 
         else:
+            await self.send_unavailable_message()
 
-            event = {
-                'type': 'send_message',
-                'ai_response': 'TripAi is not available right now. Please try again later.',
-            }
+    async def run_assistant(self):
 
-            # call event to send message to client
-            await self.channel_layer.group_send(self.room_name, event)
+        run = await self.client.beta.threads.runs.create_and_poll(
+            thread_id=self.thread.id,
+            assistant_id=self.assistant.id,
+        )
+        if run.status != 'completed':
+            return run, None
+
+        # grab the last message sent in the thread (which is the AI's message)
+        await acquire_upstream_quota_async("llm")
+        ai_message = await self.client.beta.threads.messages.list(
+            thread_id=self.thread.id,
+            limit=1,
+            order='desc'
+        )
+
+        return run, ai_message.data[0].content[0].text.value
+
+    async def run_assistant_streaming(self):
+
+        # deltas go straight to this socket, a group_send per token would cost a channel layer round trip each
+        async with self.client.beta.threads.runs.stream(
+            thread_id=self.thread.id,
+            assistant_id=self.assistant.id,
+        ) as run_stream:
+            async for text_delta in run_stream.text_deltas:
+                await self.send(text_data=json.dumps({'type': 'delta', 'delta': text_delta}))
+
+            run = await run_stream.get_final_run()
+            ai_messages = await run_stream.get_final_messages()
+
+        if run.status != 'completed' or not ai_messages:
+            return run, None
+
+        # the final messages already hold the full answer, no need to list the thread again
+        return run, ai_messages[-1].content[0].text.value
 
     async def construct_ai_response(self, places, response_data):
         
@@ -201,11 +355,25 @@ class EuroTripAiConsumer(AsyncWebsocketConsumer):
             })
         return constructed_response
 
+    async def send_unavailable_message(self):
+        await self.channel_layer.group_send(self.room_name, {
+            'type': 'send_message',
+            'ai_response': 'TripAi is not available right now. Please try again later.',
+        })
+
     async def send_message(self, event):
 
        data = event['ai_response']
        await self.send(text_data=json.dumps({'message': data}))
 
+    async def save_messages_in_database(self, message, ai_response):
+
+        # save this message/response to the database as a new user thread message
+        await self.save_user_message_to_a_new_thread_message_in_database(user_message={"message": message})
+        
+        # save this message/response to the database as a new ai guide thread message
+        await self.save_ai_response_to_a_new_thread_message_in_database(ai_response)
+
     @database_sync_to_async
     def create_new_user_thread_in_database(self, thread_id, thread_name):
 
@@ -0,0 +1,176 @@
+import hashlib
+import threading
+import time
+from dataclasses import dataclass
+from django.conf import settings
+from Places.cache import TieredCache, MISSING
+from Places.models import City
+from Places.nearby import normalize_search_keyword, singularize_word
+from User.models import Category
+
+# most chat messages name what they are after in words we already know (categories, a few synonyms, city names),
+# those are matched locally and only the rest goes to the llm extractor
+
+# synonym -> the keyword google gets searched with
+KEYWORD_SYNONYMS = {
+    "restaurant": ["food", "eat", "eating", "dinner", "lunch", "breakfast", "brunch", "dining", "place to eat"],
+    "cafe": ["coffee", "coffee shop", "espresso", "cappuccino", "tea room"],
+    "bar": ["pub", "drink", "drinks", "cocktail", "beer", "wine bar", "nightlife"],
+    "night club": ["club", "nightclub", "clubbing", "party", "dancing"],
+    "bakery": ["pastry", "croissant", "bread"],
+    "museum": ["gallery", "art gallery", "exhibition", "history"],
+    "park": ["garden", "green space", "picnic", "nature"],
+    "beach": ["sea", "seaside", "swim", "swimming", "sunbathing"],
+    "tourist attraction": ["sight", "sightseeing", "landmark", "monument", "must see"],
+    "shopping mall": ["mall", "shopping", "shop", "store", "boutique"],
+    "hotel": ["stay", "accommodation", "hostel", "sleep"],
+    "church": ["cathedral", "basilica"],
+    "castle": ["fortress", "fort"],
+}
+
+# words that carry no search intent, they neither match nor count against the local match.
+# normalized like messages are, so plurals and the pieces of "i'm" or "what's" are covered too
+STOP_WORDS = {singularize_word(word) for word in """
+a about above after again all also am an and any are around as at be been best can could d do does find for from
+get give go going good great have i in into is it like ll looking m me more most my near nearby need nice of on or
+our place please re recommend recommendation s see show some something somewhere spot suggest suggestion t that the
+their there these this those to today tomorrow tonight top ve visit want we what where which while who with would
+you your
+""".split()}
+
+CATEGORY_MATCH = "category"
+SYNONYM_MATCH = "synonym"
+CITY_MATCH = "city"
+
+# key of the (keyword, kind) a phrase ends with in a trie node, words never contain spaces
+PHRASE_END = " "
+
+
+@dataclass
+class LocalKeywords:
+    keywords: list
+    confidence: float
+
+    @property
+    def is_confident(self) -> bool:
+        return bool(self.keywords) and self.confidence >= settings.AI_GUIDE_LOCAL_KEYWORDS_MIN_CONFIDENCE
+
+
+class KeywordTrie:
+    """Word-level trie over every known phrase, matched leftmost-longest in one pass over a message."""
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, phrase: str, keyword: str, kind: str):
+        words = normalize_search_keyword(phrase).split()
+        if not words:
+            return
+        node = self.root
+        for word in words:
+            node = node.setdefault(word, {})
+        # categories are added first and win over a synonym or city spelled the same
+        node.setdefault(PHRASE_END, (keyword, kind))
+
+    def match(self, words: list) -> tuple:
+        """(matches as (keyword, kind), number of words that matched nothing and aren't stop words)."""
+        matches = []
+        unmatched = 0
+        position = 0
+        while position < len(words):
+            node = self.root
+            longest = None
+            cursor = position
+            while cursor < len(words) and words[cursor] in node:
+                node = node[words[cursor]]
+                cursor += 1
+                if PHRASE_END in node:
+                    longest = (cursor, node[PHRASE_END])
+
+            if longest is not None:
+                position, found = longest
+                matches.append(found)
+                continue
+
+            if words[position] not in STOP_WORDS:
+                unmatched += 1
+            position += 1
+        return matches, unmatched
+
+
+def build_keyword_trie() -> KeywordTrie:
+    trie = KeywordTrie()
+    category_names = {}
+    for name in Category.objects.values_list("name", flat=True):
+        trie.add(name, name, CATEGORY_MATCH)
+        category_names[normalize_search_keyword(name)] = name
+    for keyword, synonyms in KEYWORD_SYNONYMS.items():
+        # synonyms of a category search with the category's own name
+        keyword = category_names.get(normalize_search_keyword(keyword), keyword)
+        trie.add(keyword, keyword, SYNONYM_MATCH)
+        for synonym in synonyms:
+            trie.add(synonym, keyword, SYNONYM_MATCH)
+    for name in City.objects.values_list("name", flat=True):
+        trie.add(name, name, CITY_MATCH)
+    return trie
+
+
+# the trie is rebuilt per process every AI_GUIDE_KEYWORD_INDEX_TTL, categories and cities rarely change
+_trie = None
+_trie_expires_at = 0.0
+_trie_lock = threading.Lock()
+
+
+def get_keyword_trie() -> KeywordTrie:
+    global _trie, _trie_expires_at
+
+    if _trie is None or time.monotonic() >= _trie_expires_at:
+        with _trie_lock:
+            if _trie is None or time.monotonic() >= _trie_expires_at:
+                _trie = build_keyword_trie()
+                _trie_expires_at = time.monotonic() + settings.AI_GUIDE_KEYWORD_INDEX_TTL
+    return _trie
+
+
+# extracted keywords per normalized message, from either extractor
+extracted_keywords_cache = TieredCache(
+    namespace="ai_guide_keywords",
+    ttl=settings.AI_GUIDE_KEYWORDS_CACHE_TTL,
+    local_max_size=settings.AI_GUIDE_KEYWORDS_LOCAL_CACHE_SIZE,
+    local_ttl=settings.AI_GUIDE_KEYWORDS_CACHE_TTL,
+)
+
+
+def make_extracted_keywords_cache_key(message: str) -> str:
+    normalized_message = normalize_search_keyword(message)
+    return extracted_keywords_cache.make_key(hashlib.sha256(normalized_message.encode("utf-8")).hexdigest())
+
+
+def extract_keywords_locally(message: str) -> LocalKeywords:
+    matches, unmatched = get_keyword_trie().match(normalize_search_keyword(message).split())
+
+    keywords = []
+    for keyword, kind in matches:
+        # the search already runs around the current city, a city name is context and not something to search for
+        if kind != CITY_MATCH and keyword not in keywords:
+            keywords.append(keyword)
+
+    # share of the meaningful parts of the message we understood
+    confidence = len(matches) / (len(matches) + unmatched) if matches else 0.0
+    return LocalKeywords(keywords=keywords, confidence=confidence)
+
+
+def get_local_keywords(message: str) -> LocalKeywords:
+    """Cached keywords for the message, or the local extractor's. Only confident local matches are cached here."""
+    cached_keywords = extracted_keywords_cache.get(make_extracted_keywords_cache_key(message), MISSING)
+    if cached_keywords is not MISSING:
+        return LocalKeywords(keywords=cached_keywords, confidence=1.0)
+
+    local_keywords = extract_keywords_locally(message)
+    if local_keywords.is_confident:
+        cache_extracted_keywords(message, local_keywords.keywords)
+    return local_keywords
+
+
+def cache_extracted_keywords(message: str, keywords: list):
+    extracted_keywords_cache.set(make_extracted_keywords_cache_key(message), keywords)
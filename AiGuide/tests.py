@@ -1,3 +1,226 @@
-from django.test import TestCase
+import asyncio
+import time
+from unittest import mock
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from openai import OpenAIError
+from Places.models import City
+from User.models import Category
+from . import clients, keywords, timings
+from .consumers import EuroTripAiConsumer
+from .keywords import extract_keywords_locally, get_local_keywords
+from .timings import StageTimer, get_stage_timing_stats, record_stage_timing
 
-# Create your tests here.
+
+class ConsumerErrorTests(SimpleTestCase):
+
+    def make_consumer(self):
+        consumer = EuroTripAiConsumer()
+        consumer.room_name = "eurotrip_chat_session_1"
+        consumer.channel_layer = mock.AsyncMock()
+        return consumer
+
+    def test_openai_failures_answer_with_an_error_frame(self):
+        consumer = self.make_consumer()
+
+        with mock.patch.object(consumer, "respond_to_user_message", side_effect=OpenAIError("boom")), \
+                self.assertLogs("AiGuide.consumers", "WARNING"):
+            async_to_sync(consumer.receive)('{"message": "museums"}')
+
+        consumer.channel_layer.group_send.assert_awaited_once_with(consumer.room_name, {
+            'type': 'send_message',
+            'ai_response': 'TripAi is not available right now. Please try again later.',
+        })
+
+    def test_unparseable_answers_answer_with_an_error_frame(self):
+        consumer = self.make_consumer()
+        consumer.thread_id = "thread_1"
+        consumer.thread = mock.Mock(id="thread_1")
+        consumer.client = mock.AsyncMock()
+        completed_run = mock.Mock(status="completed")
+
+        with mock.patch.object(consumer, "resolve_open_ai_thread", mock.AsyncMock()), \
+                mock.patch.object(consumer, "get_places_based_on_user_message", mock.AsyncMock(return_value=[])), \
+                mock.patch.object(consumer, "run_assistant", mock.AsyncMock(return_value=(completed_run, "not json"))), \
+                mock.patch("AiGuide.consumers.get_assistant", mock.AsyncMock()), \
+                mock.patch("AiGuide.consumers.acquire_upstream_quota_async", mock.AsyncMock()), \
+                self.assertLogs("AiGuide.consumers", "WARNING"):
+            async_to_sync(consumer.receive)('{"message": "museums"}')
+
+        consumer.channel_layer.group_send.assert_awaited_once_with(consumer.room_name, {
+            'type': 'send_message',
+            'ai_response': 'TripAi is not available right now. Please try again later.',
+        })
+
+
+class SharedClientTests(SimpleTestCase):
+
+    def setUp(self):
+        async_to_sync(clients.reset_clients)()
+        self.addCleanup(async_to_sync(clients.reset_clients))
+
+    def test_client_is_shared_until_reset(self):
+        client = clients.get_openai_client()
+
+        self.assertIs(clients.get_openai_client(), client)
+        async_to_sync(clients.reset_clients)()
+        self.assertIsNot(clients.get_openai_client(), client)
+
+
+@override_settings(OPENAI_ASSISTANT_CACHE_TTL=60)
+class AssistantCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        async_to_sync(clients.reset_clients)()
+        self.addCleanup(async_to_sync(clients.reset_clients))
+
+        async def retrieve(assistant_id):
+            # gives the other callers a chance to run while this one is on its way to openai
+            await asyncio.sleep(0.01)
+            return mock.Mock(id=assistant_id)
+
+        self.retrieve = mock.AsyncMock(side_effect=retrieve)
+        openai_client = mock.Mock()
+        openai_client.beta.assistants.retrieve = self.retrieve
+        for patcher in (
+            mock.patch("AiGuide.clients.get_openai_client", return_value=openai_client),
+            mock.patch("AiGuide.clients.acquire_upstream_quota_async", mock.AsyncMock()),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def expire_assistant(self):
+        clients._assistant_expires_at = time.monotonic() - 1
+
+    def test_assistant_is_retrieved_once_per_ttl(self):
+        assistant = async_to_sync(clients.get_assistant)()
+
+        self.assertIs(async_to_sync(clients.get_assistant)(), assistant)
+        self.assertEqual(self.retrieve.await_count, 1)
+        self.assertAlmostEqual(clients._assistant_expires_at, time.monotonic() + 60, delta=1)
+
+        self.expire_assistant()
+        self.assertIsNot(async_to_sync(clients.get_assistant)(), assistant)
+        self.assertEqual(self.retrieve.await_count, 2)
+
+    def test_concurrent_callers_share_one_retrieve(self):
+        async def get_assistants():
+            return await asyncio.gather(*(clients.get_assistant() for _ in range(5)))
+
+        assistants = async_to_sync(get_assistants)()
+
+        self.assertEqual(len(set(map(id, assistants))), 1)
+        self.assertEqual(self.retrieve.await_count, 1)
+
+    def test_failed_refresh_keeps_the_cached_assistant(self):
+        assistant = async_to_sync(clients.get_assistant)()
+        self.retrieve.side_effect = OpenAIError("boom")
+        self.expire_assistant()
+
+        with self.assertLogs("AiGuide.clients", "WARNING"):
+            self.assertIs(async_to_sync(clients.get_assistant)(), assistant)
+        # the next attempt waits for another ttl
+        self.assertIs(async_to_sync(clients.get_assistant)(), assistant)
+        self.assertEqual(self.retrieve.await_count, 2)
+
+    def test_first_retrieve_failure_is_raised(self):
+        self.retrieve.side_effect = OpenAIError("boom")
+
+        with self.assertRaises(OpenAIError):
+            async_to_sync(clients.get_assistant)()
+
+
+class LocalKeywordsTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        keywords.extracted_keywords_cache.local.clear()
+        # the trie is per process, rebuild it from this test's categories and cities
+        keywords._trie = None
+        Category.objects.create(name="Museums")
+        Category.objects.create(name="Coffee Shops")
+        City.objects.create(name="Tirana", latitude=41.3275, longitude=19.8187)
+
+    def test_longest_phrase_wins(self):
+        self.assertEqual(extract_keywords_locally("coffee shops please").keywords, ["Coffee Shops"])
+        self.assertEqual(extract_keywords_locally("a strong coffee").keywords, ["cafe"])
+
+    def test_synonyms_search_with_the_category_name(self):
+        local_keywords = extract_keywords_locally("Any art galleries or museums?")
+
+        self.assertEqual(local_keywords.keywords, ["Museums"])
+        self.assertEqual(local_keywords.confidence, 1.0)
+
+    def test_cities_count_as_understood_but_are_not_keywords(self):
+        local_keywords = extract_keywords_locally("What's there to see in Tirana")
+
+        self.assertEqual(local_keywords.keywords, [])
+        self.assertFalse(local_keywords.is_confident)
+        self.assertEqual(extract_keywords_locally("museums in Tirana").confidence, 1.0)
+
+    def test_unknown_words_lower_the_confidence(self):
+        local_keywords = extract_keywords_locally("museums with medieval armour collections")
+
+        self.assertEqual(local_keywords.keywords, ["Museums"])
+        self.assertEqual(local_keywords.confidence, 0.25)
+        self.assertFalse(local_keywords.is_confident)
+
+    def test_only_confident_matches_are_cached_by_normalized_message(self):
+        self.assertEqual(get_local_keywords("Show me galleries!").keywords, ["Museums"])
+        get_local_keywords("museums with medieval armour collections")
+
+        with mock.patch.object(keywords, "extract_keywords_locally", wraps=extract_keywords_locally) as extract:
+            cached_keywords = get_local_keywords("show me  gallery")
+            get_local_keywords("museums with medieval armour collections")
+
+        self.assertEqual(cached_keywords.keywords, ["Museums"])
+        self.assertEqual(cached_keywords.confidence, 1.0)
+        extract.assert_called_once_with("museums with medieval armour collections")
+
+
+class StageTimerTests(SimpleTestCase):
+
+    def setUp(self):
+        timings._stage_stats.clear()
+        self.addCleanup(timings._stage_stats.clear)
+
+    def test_overlapping_stages_take_as_long_as_the_slowest(self):
+        timer = StageTimer()
+
+        async def run_stages():
+            await asyncio.gather(
+                timer.time("resolve_thread", asyncio.sleep(0.1)),
+                timer.time("assistant", asyncio.sleep(0.1)),
+                timer.time("city", asyncio.sleep(0.1)),
+            )
+
+        async_to_sync(run_stages)()
+
+        self.assertEqual(set(timer.durations), {"resolve_thread", "assistant", "city"})
+        self.assertTrue(all(seconds >= 0.1 for seconds in timer.durations.values()))
+        self.assertLess(timer.elapsed, sum(timer.durations.values()))
+
+    def test_failed_stages_are_timed_too(self):
+        async def fail():
+            raise OpenAIError("boom")
+
+        with self.assertRaises(OpenAIError):
+            async_to_sync(StageTimer().time)("run", fail())
+
+        self.assertEqual(get_stage_timing_stats()["run"]["count"], 1)
+
+    def test_finish_records_the_turn(self):
+        timer = StageTimer()
+        async_to_sync(timer.time)("run", asyncio.sleep(0))
+
+        with self.assertLogs("AiGuide.timings", "INFO"):
+            timer.finish()
+
+        self.assertEqual(set(get_stage_timing_stats()), {"run", "turn"})
+
+    def test_stats_aggregate_per_stage(self):
+        for seconds in (0.1, 0.3, 0.2):
+            record_stage_timing("run", seconds)
+
+        self.assertEqual(get_stage_timing_stats(), {"run": {"count": 3, "avg_seconds": 0.2, "max_seconds": 0.3}})
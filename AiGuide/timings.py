@@ -0,0 +1,58 @@
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# per-stage durations of ai guide turns in this process, since it started
+_stats_lock = threading.Lock()
+_stage_stats = {}
+
+
+def record_stage_timing(stage: str, seconds: float):
+    with _stats_lock:
+        stats = _stage_stats.setdefault(stage, {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0})
+        stats["count"] += 1
+        stats["total_seconds"] += seconds
+        stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+
+def get_stage_timing_stats() -> dict:
+    with _stats_lock:
+        return {
+            stage: {
+                "count": stats["count"],
+                "avg_seconds": round(stats["total_seconds"] / stats["count"], 4),
+                "max_seconds": round(stats["max_seconds"], 4),
+            }
+            for stage, stats in _stage_stats.items()
+        }
+
+
+class StageTimer:
+    """Times the stages of one ai guide turn. Stages may overlap, the turn's own duration is `elapsed`."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = {}
+
+    async def time(self, stage: str, awaitable):
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            seconds = time.perf_counter() - started
+            self.durations[stage] = seconds
+            record_stage_timing(stage, seconds)
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def finish(self):
+        elapsed = self.elapsed
+        record_stage_timing("turn", elapsed)
+        logger.info(
+            "AI guide turn took %.3fs (%s)", elapsed,
+            ", ".join(f"{stage} {seconds:.3f}s" for stage, seconds in self.durations.items())
+        )
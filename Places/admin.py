@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import City
+from .models import City, Place, PlacePhoto, PlaceOpeningHours, FeedSnapshot
 from import_export.admin import ImportExportModelAdmin
 
 class CityAdmin(ImportExportModelAdmin, admin.ModelAdmin):
@@ -7,4 +7,30 @@ class CityAdmin(ImportExportModelAdmin, admin.ModelAdmin):
     list_display = ['name', 'id', 'latitude', 'longitude']
     search_fields = ['name']
 
-admin.site.register(City, CityAdmin)
\ No newline at end of file
+admin.site.register(City, CityAdmin)
+
+class PlacePhotoInline(admin.TabularInline):
+    model = PlacePhoto
+    extra = 0
+
+class PlaceOpeningHoursInline(admin.StackedInline):
+    model = PlaceOpeningHours
+    extra = 0
+
+class PlaceAdmin(admin.ModelAdmin):
+
+    list_display = ['name', 'place_id', 'city_name', 'rating', 'summary_refreshed_at', 'details_refreshed_at']
+    search_fields = ['name', 'place_id', 'city_name']
+    list_filter = ['city_name']
+    inlines = [PlacePhotoInline, PlaceOpeningHoursInline]
+
+admin.site.register(Place, PlaceAdmin)
+
+class FeedSnapshotAdmin(admin.ModelAdmin):
+
+    list_display = ['city', 'category', 'version', 'refreshed_at']
+    search_fields = ['city__name', 'category']
+    list_filter = ['city']
+    exclude = ['payload']
+
+admin.site.register(FeedSnapshot, FeedSnapshotAdmin)
\ No newline at end of file
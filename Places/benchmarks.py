@@ -0,0 +1,247 @@
+import json
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from django.conf import settings
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test import Client
+from User.models import Category, User, UserSavedPlace
+from .models import City
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api/v1"
+
+BENCHMARK_CITY = {"name": "Benchmark City", "latitude": 41.3275, "longitude": 19.8187}
+BENCHMARK_SEARCH_QUERIES = ["coffee", "museum", "beach bar", "bakery", "hiking", "castle", "pizza", "wine bar"]
+
+BENCHMARK_ENDPOINTS = ["feed", "search", "details", "saved_places"]
+
+
+@dataclass
+class BenchmarkData:
+    city: City
+    tokens: list
+    interests: list
+    distinct_places: int
+
+
+class QueryCounter:
+    """Counts the queries of every connection in the process, including the ones opened by worker threads."""
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, execute, sql, params, many, context):
+        with self._lock:
+            self.count += 1
+        return execute(sql, params, many, context)
+
+    def watch(self, connection, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+    def install(self):
+        connection_created.connect(self.watch)
+        for existing_connection in connections.all():
+            self.watch(existing_connection)
+
+    def uninstall(self):
+        connection_created.disconnect(self.watch)
+        for existing_connection in connections.all():
+            if self in existing_connection.execute_wrappers:
+                existing_connection.execute_wrappers.remove(self)
+
+
+def seed_benchmark_data(users: int, saved_places_per_user: int, distinct_places: int) -> BenchmarkData:
+    city, _ = City.objects.get_or_create(
+        name=BENCHMARK_CITY["name"],
+        defaults={"latitude": BENCHMARK_CITY["latitude"], "longitude": BENCHMARK_CITY["longitude"]}
+    )
+    interests = [Category.objects.get_or_create(name=name)[0] for name in settings.DEFAULT_PLACE_CATEGORIES]
+
+    tokens = []
+    for index in range(users):
+        user = User.objects.create_user(email=f"benchmark{index}@example.com", password=None, is_active=True)
+        user.interests.set(interests)
+        UserSavedPlace.objects.bulk_create([
+            UserSavedPlace(
+                user=user,
+                city_name=city.name,
+                place_id=f"fakebench{(index * saved_places_per_user + position) % distinct_places}",
+                tag=interests[position % len(interests)].name,
+            )
+            for position in range(saved_places_per_user)
+        ])
+        tokens.append(user.auth_tokens()["access"])
+
+    return BenchmarkData(city=city, tokens=tokens, interests=[interest.name for interest in interests], distinct_places=distinct_places)
+
+
+def auth_headers(data: BenchmarkData, index: int) -> dict:
+    return {"HTTP_AUTHORIZATION": f"Bearer {data.tokens[index % len(data.tokens)]}"}
+
+
+def request_feed(client: Client, data: BenchmarkData, index: int):
+    return client.get(f"{API_PREFIX}/places/feed/{data.city.id}/", **auth_headers(data, index))
+
+
+def request_search(client: Client, data: BenchmarkData, index: int):
+    return client.post(
+        f"{API_PREFIX}/places/search/{data.city.id}/",
+        {
+            "search_query": BENCHMARK_SEARCH_QUERIES[index % len(BENCHMARK_SEARCH_QUERIES)],
+            "interests": data.interests[:2],
+        },
+        content_type="application/json",
+        **auth_headers(data, index)
+    )
+
+
+def request_details(client: Client, data: BenchmarkData, index: int):
+    place_id = f"fakebench{index % data.distinct_places}"
+    return client.get(f"{API_PREFIX}/places/place/{place_id}/{data.interests[0]}/")
+
+
+def request_saved_places(client: Client, data: BenchmarkData, index: int):
+    return client.get(f"{API_PREFIX}/user/saved-places/{data.city.id}/", **auth_headers(data, index))
+
+
+BENCHMARK_REQUESTS = {
+    "feed": request_feed,
+    "search": request_search,
+    "details": request_details,
+    "saved_places": request_saved_places,
+}
+
+
+def percentile(sorted_values: list, percent: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest rank
+    rank = max(math.ceil(percent / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def drive(make_request, data: BenchmarkData, requests: int, concurrency: int, first_index: int = 0) -> tuple:
+    """
+    Sends `requests` requests from `concurrency` threads, each with its own test client.
+    Returns (latencies, status counts) of the completed requests and the number that raised instead.
+    """
+    indexes = iter(range(first_index, first_index + requests))
+    indexes_lock = threading.Lock()
+    latencies = []
+    statuses = {}
+    errors = 0
+    results_lock = threading.Lock()
+
+    def worker():
+        nonlocal errors
+        client = Client()
+        try:
+            while True:
+                with indexes_lock:
+                    index = next(indexes, None)
+                if index is None:
+                    return
+
+                started = time.perf_counter()
+                try:
+                    response = make_request(client, data, index)
+                    # streamed responses only finish once they are read
+                    if response.streaming:
+                        b"".join(response)
+                except Exception:
+                    # the test client re-raises view exceptions, count them instead of losing the thread
+                    logger.exception("Benchmark request %s failed", index)
+                    with results_lock:
+                        errors += 1
+                    continue
+                elapsed = time.perf_counter() - started
+
+                with results_lock:
+                    latencies.append(elapsed)
+                    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        finally:
+            connection.close()
+
+    threads = [threading.Thread(target=worker, name=f"benchmark-{number}") for number in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, statuses, errors
+
+
+def count_upstream_calls(before: dict, after: dict) -> dict:
+    calls = {}
+    for endpoint, outcomes in after.items():
+        total = sum(outcomes.values()) - sum(before.get(endpoint, {}).values())
+        if total:
+            calls[endpoint] = total
+    return calls
+
+
+def run_endpoint_benchmark(endpoint: str, data: BenchmarkData, fake_google, query_counter: QueryCounter,
+                           requests: int, concurrency: int, warmup: int) -> dict:
+    make_request = BENCHMARK_REQUESTS[endpoint]
+    if warmup:
+        drive(make_request, data, warmup, concurrency)
+
+    queries_before = query_counter.count
+    upstream_before = fake_google.get_stats()
+    started = time.perf_counter()
+
+    latencies, statuses, errors = drive(make_request, data, requests, concurrency, first_index=warmup)
+
+    duration = time.perf_counter() - started
+    queries = query_counter.count - queries_before
+    upstream_calls = count_upstream_calls(upstream_before, fake_google.get_stats())
+
+    # only requests that completed count towards latency and throughput
+    completed = len(latencies)
+    latencies.sort()
+    return {
+        "requests": requests,
+        "completed": completed,
+        "errors": errors,
+        "concurrency": concurrency,
+        "duration_seconds": round(duration, 3),
+        "throughput_rps": round(completed / duration, 2) if duration else 0,
+        "latency_ms": {
+            name: round(percentile(latencies, percent) * 1000, 2)
+            for name, percent in (("p50", 50), ("p95", 95), ("p99", 99), ("max", 100))
+        },
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "db_queries": queries,
+        "db_queries_per_request": round(queries / completed, 2) if completed else 0,
+        "upstream_calls": upstream_calls,
+        "upstream_calls_per_request": round(sum(upstream_calls.values()) / completed, 3) if completed else 0,
+    }
+
+
+def compare_benchmarks(baseline: dict, results: dict, max_regression: float) -> list:
+    """Endpoints whose p95 latency, queries or upstream calls per request grew by more than `max_regression` (0.2 = 20%)."""
+    regressions = []
+    for endpoint, result in results["endpoints"].items():
+        baseline_result = baseline.get("endpoints", {}).get(endpoint)
+        if not baseline_result:
+            continue
+
+        for label, current, previous in (
+            ("p95 latency", result["latency_ms"]["p95"], baseline_result["latency_ms"]["p95"]),
+            ("db queries per request", result["db_queries_per_request"], baseline_result["db_queries_per_request"]),
+            ("upstream calls per request", result["upstream_calls_per_request"], baseline_result["upstream_calls_per_request"]),
+        ):
+            if current > previous * (1 + max_regression):
+                regressions.append(f"{endpoint}: {label} went from {previous} to {current}")
+    return regressions
+
+
+def load_benchmark_results(path: str) -> dict:
+    with open(path, encoding="utf-8") as results_file:
+        return json.load(results_file)
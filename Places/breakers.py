@@ -0,0 +1,146 @@
+import threading
+import time
+from collections import deque
+from django.conf import settings
+from .exceptions import (
+    PlacesTransientError, PlacesQuotaExceeded, UpstreamQuotaExhausted,
+    UpstreamDeadlineExceeded, UpstreamCircuitOpen
+)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+# refused by us before anything was sent, they say nothing about the upstream's health
+LOCAL_REFUSALS = (UpstreamQuotaExhausted, UpstreamDeadlineExceeded, UpstreamCircuitOpen)
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def is_upstream_failure(error: Exception) -> bool:
+    if isinstance(error, LOCAL_REFUSALS):
+        return False
+    return isinstance(error, (PlacesTransientError, PlacesQuotaExceeded))
+
+
+class CircuitBreaker:
+    """
+    Per-process breaker for one kind of upstream call.
+
+    Outcomes are kept for the last `window` seconds. Once at least `min_calls` were made
+    and `failure_rate` of them failed, the breaker opens and every call fails fast with
+    UpstreamCircuitOpen for `cooldown` seconds. After that a single probe call is let
+    through: success closes the breaker, failure opens it for another cooldown.
+    """
+
+    def __init__(self, name: str, failure_rate: float, min_calls: int, window: float, cooldown: float):
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.window = window
+        self.cooldown = cooldown
+        self.state = CIRCUIT_CLOSED
+        self.opened_at = 0.0
+        self.rejected = 0
+        self._outcomes = deque()
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        while self._outcomes and self._outcomes[0][0] <= now - self.window:
+            self._outcomes.popleft()
+
+    def _open(self, now: float):
+        self.state = CIRCUIT_OPEN
+        self.opened_at = now
+        self._outcomes.clear()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CIRCUIT_CLOSED:
+                return True
+
+            if self.state == CIRCUIT_OPEN and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = CIRCUIT_HALF_OPEN
+                self._probing = False
+
+            if self.state == CIRCUIT_HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+
+            self.rejected += 1
+            return False
+
+    def record(self, failed: bool):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == CIRCUIT_HALF_OPEN:
+                self._probing = False
+                if failed:
+                    self._open(now)
+                else:
+                    self.state = CIRCUIT_CLOSED
+                return
+
+            if self.state == CIRCUIT_OPEN:
+                # a call that started before the breaker opened
+                return
+
+            self._outcomes.append((now, failed))
+            self._trim(now)
+            failures = sum(1 for _, outcome_failed in self._outcomes if outcome_failed)
+            if len(self._outcomes) >= self.min_calls and failures >= self.failure_rate * len(self._outcomes):
+                self._open(now)
+
+    def release(self):
+        """The call was refused locally, give the probe slot back without recording an outcome."""
+        with self._lock:
+            if self.state == CIRCUIT_HALF_OPEN:
+                self._probing = False
+
+    def call(self, function, *args, **kwargs):
+        if not self.allow():
+            raise UpstreamCircuitOpen(f"Circuit for {self.name} calls is open")
+
+        try:
+            result = function(*args, **kwargs)
+        except Exception as error:
+            if isinstance(error, LOCAL_REFUSALS):
+                self.release()
+            else:
+                self.record(failed=is_upstream_failure(error))
+            raise
+
+        self.record(failed=False)
+        return result
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._trim(time.monotonic())
+            return {
+                "state": self.state,
+                "calls_in_window": len(self._outcomes),
+                "failures_in_window": sum(1 for _, failed in self._outcomes if failed),
+                "rejected": self.rejected,
+            }
+
+
+def get_circuit_breaker(name: str) -> CircuitBreaker:
+    breaker = _breakers.get(name)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(name)
+            if breaker is None:
+                breaker = _breakers[name] = CircuitBreaker(
+                    name=name,
+                    failure_rate=settings.UPSTREAM_CIRCUIT_FAILURE_RATE,
+                    min_calls=settings.UPSTREAM_CIRCUIT_MIN_CALLS,
+                    window=settings.UPSTREAM_CIRCUIT_WINDOW,
+                    cooldown=settings.UPSTREAM_CIRCUIT_COOLDOWN,
+                )
+    return breaker
+
+
+def get_circuit_breaker_stats() -> dict:
+    return {name: breaker.get_stats() for name, breaker in list(_breakers.items())}
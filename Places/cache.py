@@ -0,0 +1,264 @@
+import logging
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connection
+from .quota import low_priority
+from .deadlines import cap_timeout
+
+logger = logging.getLogger(__name__)
+
+MISSING = object()
+
+# stale-while-revalidate refreshes, shared by every TieredCache in the process
+_refresh_executor = ThreadPoolExecutor(max_workers=settings.CACHE_REFRESH_WORKERS, thread_name_prefix="cache-refresh")
+# refreshes submitted and not finished yet
+_refresh_futures_lock = threading.Lock()
+_refresh_futures = set()
+
+
+def wait_for_background_refreshes(timeout=None):
+    """Blocks until every background refresh submitted so far, and any they submitted in turn, has finished."""
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        with _refresh_futures_lock:
+            pending = list(_refresh_futures)
+        if not pending:
+            return
+        for future in pending:
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            # raises TimeoutError once the deadline passes, refresh errors are logged by the refresh itself
+            future.exception(timeout=remaining)
+
+
+def forget_refresh_future(future):
+    with _refresh_futures_lock:
+        _refresh_futures.discard(future)
+
+
+class LocalTTLCache:
+    """Process-local LRU cache, every entry expires `ttl` seconds after it was stored."""
+
+    def __init__(self, max_size: int, ttl: int):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=MISSING):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+
+            # evict least recently used entries once we go over the limit
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class SingleFlight:
+    """Runs one loader per key at a time inside this process, concurrent callers for the key wait on its future."""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, loader, wait_timeout=None):
+        with self._lock:
+            future = self._calls.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = self._calls[key] = Future()
+
+        if not is_leader:
+            try:
+                return future.result(timeout=wait_timeout)
+            except FutureTimeoutError:
+                # the leader is stuck, don't let it take every waiter down with it
+                return loader()
+
+        try:
+            value = loader()
+        except BaseException as error:
+            future.set_exception(error)
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+
+class TieredCache:
+    """
+    A process-local L1 (LocalTTLCache) in front of a shared django cache (L2).
+
+    The shared store is whatever `CACHES[cache_alias]` points to: redis in
+    production and LocMemCache when running locally or under tests.
+
+    Entries are fresh for `ttl` seconds. With a `stale_ttl`, `get_or_set` keeps
+    serving an expired entry for that much longer while one background refresh
+    per key reloads it, so callers never wait on upstream for a key they have
+    seen before. `ttl + stale_ttl` is the hard limit on how stale a value gets.
+    """
+
+    def __init__(self, namespace: str, ttl: int, local_max_size: int, local_ttl: int, stale_ttl: int = 0, cache_alias: str = "default"):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache_alias = cache_alias
+        self.local = LocalTTLCache(max_size=local_max_size, ttl=min(local_ttl, ttl + stale_ttl))
+        self.single_flight = SingleFlight()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    def make_key(self, *parts) -> str:
+        return ":".join([self.namespace, *(str(part) for part in parts)])
+
+    def get_entry(self, key):
+        """The (fresh_until, value) entry stored for `key`, preferring whichever tier holds the newest one."""
+        entry = self.local.get(key)
+        if entry is not MISSING and entry[0] > time.time():
+            return entry
+
+        shared_entry = self.shared.get(key, MISSING)
+        if shared_entry is not MISSING and (entry is MISSING or shared_entry[0] > entry[0]):
+            # promote shared hits so the next lookup in this process stays local, but never past the
+            # entry's hard limit, a nearly expired entry must not live on locally for a whole local ttl
+            hard_ttl = shared_entry[0] + self.stale_ttl - time.time()
+            self.local.set(key, shared_entry, ttl=max(min(self.local.ttl, hard_ttl), 0))
+            return shared_entry
+
+        return entry
+
+    def get_fresh_entry(self, key):
+        entry = self.get_entry(key)
+        if entry is not MISSING and entry[0] > time.time():
+            return entry
+        return MISSING
+
+    def get(self, key, default=MISSING):
+        entry = self.get_entry(key)
+        if entry is MISSING:
+            return default
+        return entry[1]
+
+    def set(self, key, value):
+        entry = (time.time() + self.ttl, value)
+        self.local.set(key, entry)
+        self.shared.set(key, entry, timeout=self.ttl + self.stale_ttl)
+
+    def delete(self, key):
+        self.local.delete(key)
+        self.shared.delete(key)
+
+    def get_or_set(self, key, loader, refresh_loader=None):
+        """
+        The cached value for `key`, loaded with `loader` on a miss. Stale entries are reloaded in
+        the background with `refresh_loader` when given, for loaders that may answer from another
+        store with its own (longer) freshness.
+        """
+        entry = self.get_entry(key)
+        if entry is not MISSING:
+            fresh_until, value = entry
+            if fresh_until <= time.time():
+                self.refresh_in_background(key, refresh_loader or loader)
+            return value
+
+        return self.single_flight.do(
+            key,
+            lambda: self.load_with_lease(key, loader),
+            wait_timeout=cap_timeout(settings.CACHE_LEASE_TIMEOUT),
+        )
+
+    def refresh_in_background(self, key, loader):
+        # the marker makes sure only one worker across all processes refreshes a key
+        refresh_key = f"{key}:refreshing"
+        if not self.shared.add(refresh_key, 1, timeout=settings.CACHE_LEASE_TIMEOUT):
+            return
+
+        def refresh():
+            try:
+                with low_priority():
+                    self.load(key, loader)
+            except Exception:
+                logger.exception("Background refresh of %s failed", key)
+            finally:
+                self.shared.delete(refresh_key)
+                # loaders may read the catalog, don't leave the connection open on a pool thread
+                connection.close()
+
+        future = _refresh_executor.submit(refresh)
+        with _refresh_futures_lock:
+            _refresh_futures.add(future)
+        future.add_done_callback(forget_refresh_future)
+
+    def load_with_lease(self, key, loader):
+        """
+        Only the worker holding the lease in the shared cache calls `loader`.
+        The other processes poll the shared cache for its result until the lease is released or expires.
+        """
+        lease_key = f"{key}:lease"
+        lease_token = uuid.uuid4().hex
+
+        if self.shared.add(lease_key, lease_token, timeout=settings.CACHE_LEASE_TIMEOUT):
+            try:
+                # another process may have filled the key while we were acquiring the lease
+                entry = self.get_fresh_entry(key)
+                if entry is not MISSING:
+                    return entry[1]
+                return self.load(key, loader)
+            finally:
+                if self.shared.get(lease_key) == lease_token:
+                    self.shared.delete(lease_key)
+
+        deadline = time.monotonic() + cap_timeout(settings.CACHE_LEASE_TIMEOUT)
+        while time.monotonic() < deadline:
+            time.sleep(settings.CACHE_LEASE_POLL_INTERVAL)
+
+            entry = self.get_fresh_entry(key)
+            if entry is not MISSING:
+                return entry[1]
+
+            # the lease holder finished without a value (upstream failed), try ourselves
+            if self.shared.get(lease_key) is None:
+                break
+
+        return self.load(key, loader)
+
+    def load(self, key, loader):
+        value = loader()
+
+        # failed lookups (None) are not cached so that the next request retries upstream
+        if value is not None:
+            self.set(key, value)
+        return value
@@ -0,0 +1,235 @@
+import logging
+import threading
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from .nearby import normalize_search_keyword
+from .models import Place, PlacePhoto, PlaceOpeningHours, PlaceSearchResult
+from .place_fields import (
+    PLACE_DETAILS_FULL, PLACE_DETAILS_AI, PLACE_DETAILS_SAVED_PLACE, shape_place_details
+)
+
+logger = logging.getLogger(__name__)
+
+# Place columns each details mode fetches from google, wider modes include the narrower ones
+PLACE_CATALOG_MODE_COLUMNS = {
+    PLACE_DETAILS_SAVED_PLACE: ["name", "address", "rating", "primary_photo_name"],
+    PLACE_DETAILS_AI: ["name", "address", "rating", "primary_photo_name", "phone", "map_directions"],
+    PLACE_DETAILS_FULL: ["name", "address", "rating", "primary_photo_name", "phone", "map_directions", "reviews", "write_a_review_url"],
+}
+
+# ingestion runs off the request path, one worker keeps writes for the same place ordered
+_ingestion_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="place-catalog")
+
+# jobs queued but not started yet, by key. At most PLACE_CATALOG_INGESTION_QUEUE_SIZE of them, so a burst of
+# traffic can't queue writes without limit. A newer job for a queued key replaces its arguments.
+_pending_lock = threading.Lock()
+_pending_jobs = {}
+_ingestion_stats = {"submitted": 0, "coalesced": 0, "dropped": 0}
+
+
+def submit_ingestion(key, function, *args):
+    if not settings.PLACE_CATALOG_ENABLED:
+        return
+
+    with _pending_lock:
+        _ingestion_stats["submitted"] += 1
+        if key in _pending_jobs:
+            # the queued job hasn't run yet, it writes this newer payload instead
+            _pending_jobs[key] = (function, args)
+            _ingestion_stats["coalesced"] += 1
+            return
+        if len(_pending_jobs) >= settings.PLACE_CATALOG_INGESTION_QUEUE_SIZE:
+            # the catalog is a copy, the next request for this place or search submits it again
+            _ingestion_stats["dropped"] += 1
+            return
+        _pending_jobs[key] = (function, args)
+
+    _ingestion_executor.submit(run_ingestion, key)
+
+
+def run_ingestion(key):
+    with _pending_lock:
+        function, args = _pending_jobs.pop(key)
+
+    try:
+        function(*args)
+    except Exception:
+        logger.exception("Place catalog ingestion failed")
+    finally:
+        # this thread lives for the whole process, don't keep a connection open between jobs
+        connection.close()
+
+
+def wait_for_ingestion(timeout=None):
+    """Blocks until every ingestion job submitted so far has run."""
+    # the single worker runs jobs in order, this one finishes after all of them
+    _ingestion_executor.submit(lambda: None).result(timeout=timeout)
+
+
+def get_ingestion_stats() -> dict:
+    with _pending_lock:
+        return dict(_ingestion_stats, queued=len(_pending_jobs))
+
+
+def place_columns_from_details(request_data: dict) -> dict:
+    google_maps_links = request_data.get("googleMapsLinks", {})
+    photos = request_data.get("photos") or [{}]
+    return {
+        "primary_photo_name": photos[0].get("name"),
+        "name": request_data.get("displayName", {}).get("text", ""),
+        "address": request_data.get("formattedAddress", ""),
+        "rating": request_data.get("rating"),
+        "phone": request_data.get("internationalPhoneNumber"),
+        "map_directions": google_maps_links.get("directionsUri"),
+        "write_a_review_url": google_maps_links.get("writeAReviewUri"),
+        "reviews": request_data.get("reviews", []),
+    }
+
+
+def ingest_place_details(payloads: list, mode: str):
+    payloads = {request_data["id"]: request_data for request_data in payloads if request_data.get("id")}
+    if not payloads:
+        return
+
+    now = timezone.now()
+    columns = PLACE_CATALOG_MODE_COLUMNS[mode]
+    update_fields = columns + ["summary_refreshed_at"]
+    if mode == PLACE_DETAILS_FULL:
+        update_fields.append("details_refreshed_at")
+
+    places = []
+    for place_id, request_data in payloads.items():
+        place_columns = place_columns_from_details(request_data)
+        places.append(Place(
+            place_id=place_id,
+            summary_refreshed_at=now,
+            details_refreshed_at=now if mode == PLACE_DETAILS_FULL else None,
+            **{column: place_columns[column] for column in columns}
+        ))
+
+    with transaction.atomic():
+        Place.objects.bulk_create(
+            places,
+            update_conflicts=True,
+            unique_fields=["place_id"],
+            update_fields=update_fields,
+        )
+        place_pks = dict(Place.objects.filter(place_id__in=payloads).values_list("place_id", "id"))
+
+        # photos and opening hours are replaced wholesale, so re-ingesting the same payload is a no-op
+        PlacePhoto.objects.filter(place_id__in=place_pks.values()).delete()
+        PlacePhoto.objects.bulk_create([
+            PlacePhoto(place_id=place_pks[place_id], name=photo["name"], position=position)
+            for place_id, request_data in payloads.items()
+            for position, photo in enumerate(request_data.get("photos", []))
+        ])
+
+        if mode != PLACE_DETAILS_SAVED_PLACE:
+            PlaceOpeningHours.objects.filter(place_id__in=place_pks.values()).delete()
+            PlaceOpeningHours.objects.bulk_create([
+                PlaceOpeningHours(
+                    place_id=place_pks[place_id],
+                    open_now=request_data["currentOpeningHours"].get("openNow"),
+                    weekday_descriptions=request_data["currentOpeningHours"].get("weekdayDescriptions", []),
+                    current_opening_hours=request_data["currentOpeningHours"],
+                )
+                for place_id, request_data in payloads.items() if request_data.get("currentOpeningHours")
+            ])
+
+
+def ingest_nearby_search_results(city_name: str, keyword: str, results: list):
+    results = list({place["place_id"]: place for place in results if place.get("place_id")}.values())
+    keyword = normalize_search_keyword(keyword)
+    if len(keyword) > PlaceSearchResult._meta.get_field("keyword").max_length:
+        logger.warning("Not cataloging nearby search results for an overlong keyword (%d characters)", len(keyword))
+        return
+    now = timezone.now()
+
+    places = []
+    for place in results:
+        photos = place.get("photos") or [{}]
+        places.append(Place(
+            place_id=place["place_id"],
+            city_name=city_name,
+            name=place.get("name", ""),
+            rating=place.get("rating"),
+            nearby_photo_reference=photos[0].get("photo_reference"),
+        ))
+
+    with transaction.atomic():
+        if places:
+            Place.objects.bulk_create(
+                places,
+                update_conflicts=True,
+                unique_fields=["place_id"],
+                update_fields=["city_name", "name", "rating", "nearby_photo_reference"],
+            )
+        place_pks = dict(Place.objects.filter(place_id__in=[place.place_id for place in places]).values_list("place_id", "id"))
+
+        PlaceSearchResult.objects.filter(city_name=city_name, keyword=keyword).delete()
+        PlaceSearchResult.objects.bulk_create([
+            PlaceSearchResult(
+                place_id=place_pks[place["place_id"]],
+                city_name=city_name,
+                keyword=keyword,
+                position=position,
+                refreshed_at=now,
+            )
+            for position, place in enumerate(results)
+        ])
+
+
+def get_catalog_nearby_search_results(city_name: str, keywords: list, max_age: int = None) -> dict:
+    """
+    Catalog results per keyword, shaped like `places_nearby` results. Keywords missing or older than
+    `max_age` (PLACE_CATALOG_NEARBY_MAX_AGE by default) are left out.
+    """
+    if not settings.PLACE_CATALOG_ENABLED or not keywords:
+        return {}
+
+    keywords_by_normalized = {normalize_search_keyword(keyword): keyword for keyword in keywords}
+    fresh_since = timezone.now() - timedelta(seconds=settings.PLACE_CATALOG_NEARBY_MAX_AGE if max_age is None else max_age)
+
+    search_results = PlaceSearchResult.objects.filter(
+        city_name=city_name,
+        keyword__in=keywords_by_normalized,
+        refreshed_at__gte=fresh_since,
+    ).select_related("place").order_by("keyword", "position")
+
+    results_by_keyword = {}
+    for search_result in search_results:
+        place = search_result.place
+        nearby_place = {
+            "place_id": place.place_id,
+            "name": place.name,
+        }
+        if place.rating is not None:
+            nearby_place["rating"] = place.rating
+        if place.nearby_photo_reference:
+            nearby_place["photos"] = [{"photo_reference": place.nearby_photo_reference}]
+
+        results_by_keyword.setdefault(keywords_by_normalized[search_result.keyword], []).append(nearby_place)
+
+    return results_by_keyword
+
+
+def get_catalog_place_details(place_id: str, mode: str, photo_url, max_age: int = None) -> dict | None:
+    if not settings.PLACE_CATALOG_ENABLED:
+        return None
+
+    fresh_since = timezone.now() - timedelta(seconds=settings.PLACE_CATALOG_DETAILS_MAX_AGE if max_age is None else max_age)
+    if mode == PLACE_DETAILS_SAVED_PLACE:
+        freshness_filter = {"summary_refreshed_at__gte": fresh_since}
+    else:
+        freshness_filter = {"details_refreshed_at__gte": fresh_since}
+
+    place = Place.objects.filter(
+        place_id=place_id, **freshness_filter
+    ).select_related("opening_hours").prefetch_related("photos").first()
+
+    if place is None:
+        return None
+    return shape_place_details(place.as_places_api_payload(), mode, photo_url=photo_url)
@@ -0,0 +1,107 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from googlemaps import Client
+from django.conf import settings
+from .deadlines import get_call_timeout
+
+# one set of upstream clients per worker process, created lazily on first use
+_lock = threading.Lock()
+_sessions = {}
+_maps_client = None
+
+MAPS_SESSION = "maps"
+PLACES_SESSION = "places"
+
+
+class DeadlineSession(requests.Session):
+    """Caps the timeout of every request it sends, including the googlemaps client's, by the remaining request deadline."""
+
+    def request(self, method, url, **kwargs):
+        kwargs["timeout"] = get_call_timeout(kwargs.get("timeout"))
+        return super().request(method, url, **kwargs)
+
+
+def build_pooled_session() -> requests.Session:
+    adapter = HTTPAdapter(
+        pool_connections=settings.GOOGLE_HTTP_POOL_CONNECTIONS,
+        pool_maxsize=settings.GOOGLE_HTTP_POOL_MAXSIZE,
+    )
+    session = DeadlineSession()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session(name: str) -> requests.Session:
+    session = _sessions.get(name)
+    if session is None:
+        with _lock:
+            session = _sessions.get(name)
+            if session is None:
+                session = _sessions[name] = build_pooled_session()
+    return session
+
+
+def get_places_session() -> requests.Session:
+    """Keep-alive session for the Places v1 REST calls."""
+    return get_session(PLACES_SESSION)
+
+
+def get_places_request_timeout() -> tuple:
+    return (settings.GOOGLE_HTTP_CONNECT_TIMEOUT, settings.GOOGLE_HTTP_READ_TIMEOUT)
+
+
+def get_maps_client() -> Client:
+    """Shared legacy googlemaps client, backed by its own keep-alive session."""
+    global _maps_client
+
+    if _maps_client is None:
+        session = get_session(MAPS_SESSION)
+        with _lock:
+            if _maps_client is None:
+                _maps_client = Client(
+                    key=settings.GOOGLE_API_KEY,
+                    base_url=settings.GOOGLE_MAPS_BASE_URL,
+                    connect_timeout=settings.GOOGLE_HTTP_CONNECT_TIMEOUT,
+                    read_timeout=settings.GOOGLE_HTTP_READ_TIMEOUT,
+                    # the client retries 5xx and rate limits on its own for up to a minute by default
+                    retry_timeout=settings.GOOGLE_MAPS_RETRY_TIMEOUT,
+                    retry_over_query_limit=False,
+                    requests_session=session,
+                )
+    return _maps_client
+
+
+def reset_clients():
+    """Close the pooled clients, the next call builds them again from the current settings."""
+    global _maps_client
+
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+        _maps_client = None
+
+
+def get_connection_pool_stats() -> dict:
+    """Requests served and connections opened per session, everything else was a reused keep-alive connection."""
+    stats = {}
+    for name, session in list(_sessions.items()):
+        total_requests = 0
+        new_connections = 0
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for pool_key in pools.keys():
+                pool = pools.get(pool_key)
+                if pool is None:
+                    continue
+                total_requests += pool.num_requests
+                new_connections += pool.num_connections
+
+        stats[name] = {
+            "requests": total_requests,
+            "new_connections": new_connections,
+            "reused_connections": max(total_requests - new_connections, 0),
+        }
+    return stats
@@ -0,0 +1,65 @@
+import contextvars
+import time
+from contextlib import contextmanager
+from django.conf import settings
+from .exceptions import UpstreamDeadlineExceeded
+
+# absolute time.monotonic() by which the current request must be done with google, None means unbounded
+upstream_deadline = contextvars.ContextVar("upstream_deadline", default=None)
+
+
+@contextmanager
+def request_deadline(seconds: float):
+    """Bounds every upstream call made inside the block. A nested deadline can only shorten the outer one."""
+    deadline = time.monotonic() + seconds
+    current = upstream_deadline.get()
+    if current is not None:
+        deadline = min(deadline, current)
+
+    token = upstream_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        upstream_deadline.reset(token)
+
+
+def get_remaining_time() -> float | None:
+    deadline = upstream_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def cap_timeout(timeout: float) -> float:
+    """`timeout`, shortened to what is left of the deadline. Used for waits that must not outlive the request."""
+    remaining = get_remaining_time()
+    if remaining is None:
+        return timeout
+    return max(min(timeout, remaining), 0)
+
+
+def has_time_left(seconds: float) -> bool:
+    remaining = get_remaining_time()
+    return remaining is None or remaining >= seconds
+
+
+def ensure_time_left(what: str):
+    if not has_time_left(settings.UPSTREAM_MIN_CALL_BUDGET):
+        raise UpstreamDeadlineExceeded(f"No time left in the request deadline for {what}")
+
+
+def get_call_timeout(timeout):
+    """
+    The requests `timeout` for the next upstream call: the configured (connect, read) timeout,
+    with both parts capped by the remaining deadline.
+    """
+    remaining = get_remaining_time()
+    if remaining is None:
+        return timeout
+
+    ensure_time_left("the upstream call")
+    if timeout is None:
+        return remaining
+    if isinstance(timeout, tuple):
+        return tuple(remaining if part is None else min(part, remaining) for part in timeout)
+    return min(timeout, remaining)
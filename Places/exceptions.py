@@ -0,0 +1,87 @@
+from googlemaps import exceptions as googlemaps_exceptions
+
+
+class PlacesUpstreamError(Exception):
+    """A Google Places call failed."""
+
+class PlaceNotFound(PlacesUpstreamError):
+    """The place id is unknown, invalid or the place was removed. Retrying will not help."""
+
+class PlacesRequestError(PlacesUpstreamError):
+    """Google rejected the request itself (a bad field mask, a malformed id or parameter). Says nothing about the place."""
+
+class PlacePhotoUnreadable(PlacesUpstreamError):
+    """The photo source answered with something that is not a readable image."""
+
+class PlacesQuotaExceeded(PlacesUpstreamError):
+    """Google rejected the call because of quota, rate limits or the api key."""
+
+class PlacesTransientError(PlacesUpstreamError):
+    """Timeouts, connection errors and 5xx responses, worth retrying after a backoff."""
+
+class UpstreamQuotaExhausted(PlacesQuotaExceeded):
+    """Our own outbound scheduler shed the call before it reached Google or OpenAI."""
+
+class UpstreamDeadlineExceeded(PlacesUpstreamError):
+    """The request's deadline left too little time to make (or retry) the call."""
+
+class UpstreamCircuitOpen(PlacesUpstreamError):
+    """The circuit breaker for this upstream is open, the call was failed without being sent."""
+
+
+def classify_places_error_response(status_code: int, request_data: dict) -> PlacesUpstreamError:
+    error = request_data.get("error", {}) if isinstance(request_data, dict) else {}
+    error_status = error.get("status", "")
+    message = error.get("message", "") or f"Places API responded with {status_code}"
+
+    if status_code == 404 or error_status == "NOT_FOUND":
+        return PlaceNotFound(message)
+
+    # INVALID_ARGUMENT is as likely our own bad field mask as a bad id, it must not mark the place as unknown
+    if status_code == 400 or error_status == "INVALID_ARGUMENT":
+        return PlacesRequestError(message)
+
+    if status_code in (403, 429) or error_status in ("RESOURCE_EXHAUSTED", "PERMISSION_DENIED"):
+        return PlacesQuotaExceeded(message)
+
+    if status_code >= 500 or error_status in ("UNAVAILABLE", "DEADLINE_EXCEEDED", "INTERNAL"):
+        return PlacesTransientError(message)
+
+    return PlacesUpstreamError(message)
+
+# everything the googlemaps client raises for a failed call
+MAPS_CLIENT_ERRORS = (
+    googlemaps_exceptions.ApiError,
+    googlemaps_exceptions.HTTPError,
+    googlemaps_exceptions.Timeout,
+    googlemaps_exceptions.TransportError,
+)
+
+
+def classify_maps_client_error(error: Exception) -> PlacesUpstreamError:
+    """Map the exceptions raised by the legacy googlemaps client onto ours."""
+    if isinstance(error, PlacesUpstreamError):
+        return error
+
+    if isinstance(error, googlemaps_exceptions.TransportError):
+        # our deadline check in the session comes back wrapped by the client
+        if isinstance(error.base_exception, PlacesUpstreamError):
+            return error.base_exception
+        return PlacesTransientError(str(error))
+
+    if isinstance(error, googlemaps_exceptions.Timeout):
+        return PlacesTransientError("Places API timed out")
+
+    if isinstance(error, googlemaps_exceptions.HTTPError):
+        if error.status_code >= 500:
+            return PlacesTransientError(str(error))
+        return PlacesUpstreamError(str(error))
+
+    if isinstance(error, googlemaps_exceptions.ApiError):
+        if error.status in ("OVER_QUERY_LIMIT", "REQUEST_DENIED"):
+            return PlacesQuotaExceeded(str(error))
+        if error.status == "UNKNOWN_ERROR":
+            return PlacesTransientError(str(error))
+        return PlacesUpstreamError(str(error))
+
+    return PlacesUpstreamError(str(error))
@@ -0,0 +1,310 @@
+import base64
+import hashlib
+import io
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from django.conf import settings
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# a local stand-in for the google endpoints the Feed uses, run by `manage.py fake_google_places`.
+# requests are answered from recordings, recorded from google once in record mode, or synthesized
+# from the request so the same request always gets the same answer.
+
+GOOGLE_MAPS_URL = "https://maps.googleapis.com"
+GOOGLE_PLACES_URL = "https://places.googleapis.com"
+
+NEARBY_SEARCH = "nearby"
+PLACE_DETAILS = "details"
+PLACE_PHOTO = "photo"
+
+# path -> (endpoint, upstream it is recorded from)
+ENDPOINT_PATTERNS = [
+    (re.compile(r"^/maps/api/place/nearbysearch/json$"), NEARBY_SEARCH, GOOGLE_MAPS_URL),
+    (re.compile(r"^/maps/api/place/photo$"), PLACE_PHOTO, GOOGLE_MAPS_URL),
+    (re.compile(r"^/v1/places/[^/]+/photos/[^/]+/media$"), PLACE_PHOTO, GOOGLE_PLACES_URL),
+    (re.compile(r"^/v1/places/[^/]+$"), PLACE_DETAILS, GOOGLE_PLACES_URL),
+]
+
+SYNTHETIC_NEARBY_RESULTS = 20
+
+
+@dataclass
+class FakeGoogleConfig:
+    recordings_dir: str
+    record: bool = False
+    synthesize: bool = True
+    latency_ms: float = 0
+    jitter_ms: float = 0
+    error_rate: float = 0
+    rate_limit: int = 0
+
+
+@dataclass
+class FakeResponse:
+    status: int
+    content_type: str
+    body: bytes
+
+    @classmethod
+    def json(cls, data, status=200):
+        return cls(status, "application/json; charset=UTF-8", json.dumps(data).encode("utf-8"))
+
+
+def get_endpoint(path: str):
+    for pattern, endpoint, upstream in ENDPOINT_PATTERNS:
+        if pattern.match(path):
+            return endpoint, upstream
+    return None, None
+
+
+def get_recording_key(path: str, query: str) -> str:
+    # the api key never takes part in the key, recordings work with any key
+    params = sorted((name, value) for name, value in parse_qsl(query) if name != "key")
+    return hashlib.sha256(f"{path}?{urlencode(params)}".encode("utf-8")).hexdigest()
+
+
+def get_recording_path(recordings_dir: str, key: str) -> str:
+    return os.path.join(recordings_dir, key[:2], f"{key}.json")
+
+
+def load_recording(recordings_dir: str, key: str) -> FakeResponse | None:
+    try:
+        with open(get_recording_path(recordings_dir, key), encoding="utf-8") as recording_file:
+            recording = json.load(recording_file)
+    except FileNotFoundError:
+        return None
+    return FakeResponse(recording["status"], recording["content_type"], base64.b64decode(recording["body"]))
+
+
+def save_recording(recordings_dir: str, key: str, path: str, query: str, response: FakeResponse):
+    recording_path = get_recording_path(recordings_dir, key)
+    os.makedirs(os.path.dirname(recording_path), exist_ok=True)
+    with open(recording_path, "w", encoding="utf-8") as recording_file:
+        json.dump({
+            "path": path,
+            "query": [[name, value] for name, value in parse_qsl(query) if name != "key"],
+            "status": response.status,
+            "content_type": response.content_type,
+            "body": base64.b64encode(response.body).decode("ascii"),
+        }, recording_file, indent=2)
+
+
+def fetch_from_google(upstream: str, path: str, query: str) -> FakeResponse:
+    params = [(name, value) for name, value in parse_qsl(query) if name != "key"]
+    params.append(("key", settings.GOOGLE_API_KEY))
+    response = requests.get(f"{upstream}{path}", params=params, timeout=(5, 30))
+    return FakeResponse(response.status_code, response.headers.get("Content-Type", "application/octet-stream"), response.content)
+
+
+def seeded_random(*parts) -> random.Random:
+    return random.Random(":".join(str(part) for part in parts))
+
+
+def synthesize_nearby_search(params: dict) -> FakeResponse:
+    keyword = params.get("keyword", "place")
+    location = params.get("location", "0,0")
+    seed = hashlib.sha256(f"{location}:{keyword}".encode("utf-8")).hexdigest()[:12]
+    rng = seeded_random(seed)
+
+    results = []
+    for index in range(SYNTHETIC_NEARBY_RESULTS):
+        place = {
+            "place_id": f"fake{seed}{index:02d}",
+            "name": f"{keyword.title()} {index + 1}",
+            "rating": round(rng.uniform(3.0, 5.0), 1),
+            "vicinity": f"{index + 1} Fake Street",
+        }
+        # like google, a few results come without photos
+        if rng.random() > 0.1:
+            place["photos"] = [{"photo_reference": f"fakephoto{seed}{index:02d}", "height": 800, "width": 1200}]
+        results.append(place)
+    return FakeResponse.json({"results": results, "status": "OK"})
+
+
+def synthesize_place_details(path: str) -> FakeResponse:
+    place_id = path.rsplit("/", 1)[-1]
+    rng = seeded_random(place_id)
+    return FakeResponse.json({
+        "id": place_id,
+        "displayName": {"text": f"Fake place {place_id[-6:]}", "languageCode": "en"},
+        "formattedAddress": f"{rng.randint(1, 200)} Fake Street",
+        "rating": round(rng.uniform(3.0, 5.0), 1),
+        "internationalPhoneNumber": f"+355 69 {rng.randint(1000000, 9999999)}",
+        "googleMapsLinks": {
+            "directionsUri": f"https://maps.example.com/directions/{place_id}",
+            "writeAReviewUri": f"https://maps.example.com/review/{place_id}",
+        },
+        "photos": [{"name": f"places/{place_id}/photos/fake{index}"} for index in range(3)],
+        "currentOpeningHours": {
+            "openNow": rng.random() > 0.3,
+            "weekdayDescriptions": [f"{day}: 9:00 AM – 10:00 PM" for day in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")],
+        },
+        "reviews": [
+            {
+                "rating": rng.randint(3, 5),
+                "text": {"text": f"Review {index + 1} of a fake place", "languageCode": "en"},
+                "authorAttribution": {"displayName": f"Reviewer {index + 1}", "photoUri": ""},
+                "publishTime": "2025-01-01T00:00:00Z",
+            }
+            for index in range(3)
+        ],
+    })
+
+
+_photo_lock = threading.Lock()
+_photos = {}
+
+
+def synthesize_photo(path: str, query: str) -> FakeResponse:
+    # one flat colour per photo, as large as the biggest variant the proxy asks for
+    color = tuple(seeded_random(path, query).randint(0, 255) for _ in range(3))
+    with _photo_lock:
+        body = _photos.get(color)
+        if body is None:
+            output = io.BytesIO()
+            Image.new("RGB", (1200, 800), color).save(output, format="JPEG", quality=80)
+            body = _photos[color] = output.getvalue()
+    return FakeResponse(200, "image/jpeg", body)
+
+
+def synthesize(endpoint: str, path: str, query: str) -> FakeResponse:
+    if endpoint == NEARBY_SEARCH:
+        return synthesize_nearby_search(dict(parse_qsl(query)))
+    if endpoint == PLACE_DETAILS:
+        return synthesize_place_details(path)
+    return synthesize_photo(path, query)
+
+
+def build_error_response(endpoint: str, upstream: str, status: int, google_status: str) -> FakeResponse:
+    # the legacy api reports quota errors inside a 200, Places v1 uses the http status
+    if upstream == GOOGLE_MAPS_URL and endpoint == NEARBY_SEARCH and status == 429:
+        return FakeResponse.json({"results": [], "status": "OVER_QUERY_LIMIT", "error_message": "Fake rate limit"})
+    return FakeResponse.json({"error": {"code": status, "message": f"Fake {google_status}", "status": google_status}}, status=status)
+
+
+class FakeGoogle:
+    """Everything the request handler needs: the config, recordings and per-endpoint counters."""
+
+    def __init__(self, config: FakeGoogleConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.stats = {}
+        self.window = 0
+        self.window_requests = 0
+
+    def count(self, endpoint: str, outcome: str):
+        with self.lock:
+            endpoint_stats = self.stats.setdefault(endpoint, {})
+            endpoint_stats[outcome] = endpoint_stats.get(outcome, 0) + 1
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {endpoint: dict(endpoint_stats) for endpoint, endpoint_stats in self.stats.items()}
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {}
+
+    def is_rate_limited(self) -> bool:
+        if not self.config.rate_limit:
+            return False
+        window = int(time.time())
+        with self.lock:
+            if window != self.window:
+                self.window = window
+                self.window_requests = 0
+            self.window_requests += 1
+            return self.window_requests > self.config.rate_limit
+
+    def sleep(self):
+        delay = self.config.latency_ms + random.uniform(0, self.config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+    def respond(self, path: str, query: str) -> FakeResponse:
+        endpoint, upstream = get_endpoint(path)
+        if endpoint is None:
+            return FakeResponse.json({"error": {"code": 404, "message": f"Not faked: {path}", "status": "NOT_FOUND"}}, status=404)
+
+        self.sleep()
+
+        if self.is_rate_limited():
+            self.count(endpoint, "rate_limited")
+            return build_error_response(endpoint, upstream, 429, "RESOURCE_EXHAUSTED")
+
+        if self.config.error_rate and random.random() < self.config.error_rate:
+            self.count(endpoint, "errors")
+            return build_error_response(endpoint, upstream, 503, "UNAVAILABLE")
+
+        key = get_recording_key(path, query)
+        response = load_recording(self.config.recordings_dir, key)
+        if response is not None:
+            self.count(endpoint, "replayed")
+            return response
+
+        if self.config.record:
+            response = fetch_from_google(upstream, path, query)
+            save_recording(self.config.recordings_dir, key, path, query, response)
+            self.count(endpoint, "recorded")
+            return response
+
+        if self.config.synthesize:
+            self.count(endpoint, "synthesized")
+            return synthesize(endpoint, path, query)
+
+        self.count(endpoint, "missing")
+        return build_error_response(endpoint, upstream, 404, "NOT_FOUND")
+
+
+class FakeGoogleRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def fake_google(self) -> FakeGoogle:
+        return self.server.fake_google
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == "/__stats__":
+            return self.send(FakeResponse.json(self.fake_google.get_stats()))
+
+        try:
+            response = self.fake_google.respond(url.path, url.query)
+        except Exception as error:
+            logger.exception("Fake google failed for %s", self.path)
+            response = FakeResponse.json({"error": {"code": 500, "message": str(error), "status": "INTERNAL"}}, status=500)
+        self.send(response)
+
+    def do_POST(self):
+        if urlsplit(self.path).path == "/__reset__":
+            self.fake_google.reset_stats()
+            return self.send(FakeResponse.json({"status": "OK"}))
+        self.send(FakeResponse.json({"error": {"code": 405, "status": "METHOD_NOT_ALLOWED"}}, status=405))
+
+    def send(self, response: FakeResponse):
+        self.send_response(response.status)
+        self.send_header("Content-Type", response.content_type)
+        self.send_header("Content-Length", str(len(response.body)))
+        self.end_headers()
+        self.wfile.write(response.body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+def build_fake_google_server(host: str, port: int, config: FakeGoogleConfig) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer((host, port), FakeGoogleRequestHandler)
+    server.daemon_threads = True
+    server.fake_google = FakeGoogle(config)
+    return server
@@ -0,0 +1,161 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import threading
+from unittest import mock
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+from django.utils import timezone
+from rest_framework.throttling import SimpleRateThrottle
+from Places.cache import wait_for_background_refreshes
+from Places.catalog import wait_for_ingestion
+from Places.benchmarks import (
+    BENCHMARK_ENDPOINTS, QueryCounter, seed_benchmark_data, run_endpoint_benchmark,
+    compare_benchmarks, load_benchmark_results
+)
+from Places.clients import reset_clients
+from Places.fake_google import FakeGoogleConfig, build_fake_google_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the feed, search, place details and saved places endpoints against a throwaway test "
+        "database and the fake google server. Reports latency percentiles, throughput, db queries and "
+        "upstream calls per endpoint as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--endpoint", action="append", dest="endpoints", choices=BENCHMARK_ENDPOINTS, help="Only benchmark this endpoint (repeatable).")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=8, help="Requests in flight at once.")
+        parser.add_argument("--warmup", type=int, default=0, help="Unmeasured requests sent first, to benchmark warm caches.")
+        parser.add_argument("--users", type=int, default=20)
+        parser.add_argument("--saved-places", type=int, default=10, help="Saved places per user.")
+        parser.add_argument("--distinct-places", type=int, default=200, help="Distinct place ids used by details and saved places.")
+        parser.add_argument("--latency-ms", type=float, default=80, help="Fake google latency.")
+        parser.add_argument("--jitter-ms", type=float, default=40, help="Random extra fake google latency, up to this much.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Share of fake google requests answered with a 503.")
+        parser.add_argument("--rate-limit", type=int, default=0, help="Fake google requests per second, 0 for no limit.")
+        parser.add_argument("--recordings", default=settings.FAKE_GOOGLE_RECORDINGS_DIR, help="Recordings replayed by the fake google server.")
+        parser.add_argument("--output", default="benchmark_results.json", help="Where to write the JSON results.")
+        parser.add_argument("--baseline", default=None, help="Earlier results to compare against, fails on regressions.")
+        parser.add_argument("--max-regression", type=float, default=0.2, help="Allowed growth over the baseline, 0.2 = 20%%.")
+
+    def handle(self, *args, **options):
+        endpoints = options["endpoints"] or BENCHMARK_ENDPOINTS
+        fake_config = FakeGoogleConfig(
+            recordings_dir=options["recordings"],
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            rate_limit=options["rate_limit"],
+        )
+
+        setup_test_environment()
+        if connection.vendor == "sqlite":
+            # threads can't share sqlite's in-memory test database, use a file
+            connection.settings_dict["TEST"]["NAME"] = os.path.join(tempfile.mkdtemp(prefix="benchmark-"), "benchmark.sqlite3")
+        old_database_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+
+        fake_google_server = build_fake_google_server("127.0.0.1", 0, fake_config)
+        threading.Thread(target=fake_google_server.serve_forever, daemon=True).start()
+        fake_google_url = f"http://127.0.0.1:{fake_google_server.server_address[1]}"
+
+        # throttles still run, they just never reject the benchmark's traffic
+        unlimited_rates = {scope: "1000000/s" for scope in SimpleRateThrottle.THROTTLE_RATES}
+
+        try:
+            with override_settings(
+                GOOGLE_MAPS_BASE_URL=fake_google_url,
+                GOOGLE_PLACES_BASE_URL=f"{fake_google_url}/v1",
+                CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "benchmark"}},
+            ), mock.patch.dict(SimpleRateThrottle.THROTTLE_RATES, unlimited_rates):
+                reset_clients()
+                data = seed_benchmark_data(
+                    users=options["users"],
+                    saved_places_per_user=options["saved_places"],
+                    distinct_places=options["distinct_places"],
+                )
+
+                query_counter = QueryCounter()
+                query_counter.install()
+                try:
+                    endpoint_results = {}
+                    for endpoint in endpoints:
+                        endpoint_results[endpoint] = result = run_endpoint_benchmark(
+                            endpoint, data, fake_google_server.fake_google, query_counter,
+                            requests=options["requests"],
+                            concurrency=options["concurrency"],
+                            warmup=options["warmup"],
+                        )
+                        self.write_summary(endpoint, result)
+                finally:
+                    query_counter.uninstall()
+                    # background refreshes and catalog writes outlive the requests that started them, they must finish
+                    # against the fake google server and the test database before either goes away.
+                    # Refreshes submit ingestion, so they are drained first
+                    wait_for_background_refreshes()
+                    wait_for_ingestion()
+        finally:
+            reset_clients()
+            fake_google_server.shutdown()
+            fake_google_server.server_close()
+            connection.creation.destroy_test_db(old_database_name, verbosity=0)
+            teardown_test_environment()
+
+        results = {
+            "meta": {
+                "started_at": timezone.now().isoformat(),
+                "commit": self.get_commit(),
+                "database": connection.vendor,
+                "python": platform.python_version(),
+                "fake_google": {
+                    "latency_ms": fake_config.latency_ms,
+                    "jitter_ms": fake_config.jitter_ms,
+                    "error_rate": fake_config.error_rate,
+                    "rate_limit": fake_config.rate_limit,
+                },
+                "users": options["users"],
+                "saved_places_per_user": options["saved_places"],
+                "distinct_places": options["distinct_places"],
+                "warmup": options["warmup"],
+            },
+            "endpoints": endpoint_results,
+        }
+        with open(options["output"], "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+        failed = [
+            f"{endpoint}: {result['errors']} errors, {result['completed']} of {result['requests']} requests completed"
+            for endpoint, result in endpoint_results.items()
+            if result["errors"] or result["completed"] < result["requests"]
+        ]
+        if failed:
+            raise CommandError("Benchmark requests failed:\n" + "\n".join(failed))
+
+        if options["baseline"]:
+            regressions = compare_benchmarks(load_benchmark_results(options["baseline"]), results, options["max_regression"])
+            if regressions:
+                raise CommandError("Regressions against the baseline:\n" + "\n".join(regressions))
+            self.stdout.write(self.style.SUCCESS("No regressions against the baseline"))
+
+    def write_summary(self, endpoint: str, result: dict):
+        latency = result["latency_ms"]
+        self.stdout.write(
+            f"{endpoint:<13} p50 {latency['p50']:>8}ms  p95 {latency['p95']:>8}ms  p99 {latency['p99']:>8}ms  "
+            f"{result['throughput_rps']:>8} req/s  {result['db_queries_per_request']:>6} queries/req  "
+            f"{result['upstream_calls_per_request']:>6} upstream/req  statuses {result['statuses']}  errors {result['errors']}"
+        )
+
+    def get_commit(self) -> str | None:
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from Places.fake_google import FakeGoogleConfig, build_fake_google_server
+
+
+class Command(BaseCommand):
+    help = (
+        "Serve recorded (or synthesized) Google nearby search, place details and photo responses locally. "
+        "Point GOOGLE_MAPS_BASE_URL at http://HOST:PORT and GOOGLE_PLACES_BASE_URL at http://HOST:PORT/v1 to use it. "
+        "GET /__stats__ returns per-endpoint counters, POST /__reset__ clears them."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument("--recordings", default=settings.FAKE_GOOGLE_RECORDINGS_DIR, help="Directory recordings are replayed from and written to.")
+        parser.add_argument("--record", action="store_true", help="Forward requests without a recording to google and save the response.")
+        parser.add_argument("--no-synthesize", action="store_true", help="Answer requests without a recording with a 404 instead of a synthesized response.")
+        parser.add_argument("--latency-ms", type=float, default=0, help="Added to every response.")
+        parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra latency, up to this much.")
+        parser.add_argument("--error-rate", type=float, default=0, help="Share of requests answered with a 503 UNAVAILABLE.")
+        parser.add_argument("--rate-limit", type=int, default=0, help="Requests per second before answering with rate limit errors, 0 for no limit.")
+
+    def handle(self, *args, **options):
+        config = FakeGoogleConfig(
+            recordings_dir=options["recordings"],
+            record=options["record"],
+            synthesize=not options["no_synthesize"],
+            latency_ms=options["latency_ms"],
+            jitter_ms=options["jitter_ms"],
+            error_rate=options["error_rate"],
+            rate_limit=options["rate_limit"],
+        )
+        server = build_fake_google_server(options["host"], options["port"], config)
+
+        mode = "recording" if config.record else "replaying"
+        self.stdout.write(self.style.SUCCESS(f"Fake google {mode} on http://{options['host']}:{options['port']} ({config.recordings_dir})"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from Places.refresh import link_saved_places_to_catalog, get_saved_places_needing_refresh, refresh_place_summaries
+
+
+class Command(BaseCommand):
+    help = "Refresh the catalog summaries behind saved places, stale and most saved places first."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=500, help="Refresh at most this many places per run.")
+        parser.add_argument("--every", type=int, default=None, help="Keep running and refresh again every N seconds (scheduler mode).")
+
+    def handle(self, *args, **options):
+        while True:
+            linked = link_saved_places_to_catalog()
+            if linked:
+                self.stdout.write(f"Linked {linked} saved places to the catalog")
+
+            place_ids = get_saved_places_needing_refresh(limit=options["limit"])
+            refreshed = refresh_place_summaries(place_ids) if place_ids else 0
+            self.stdout.write(self.style.SUCCESS(f"Refreshed {refreshed} of {len(place_ids)} stale saved places"))
+
+            if not options["every"]:
+                break
+
+            close_old_connections()
+            time.sleep(options["every"])
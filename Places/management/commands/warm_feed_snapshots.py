@@ -0,0 +1,69 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+from Places.models import City
+from Places.quota import low_priority
+from Places.snapshots import save_feed_snapshot, get_stale_feed_snapshot_categories
+from Places.utils import Feed
+from User.models import Category
+
+
+class Command(BaseCommand):
+    help = "Precompute feed snapshots for every City x category so get_user_feed can skip live Google searches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--city", action="append", dest="cities", help="Only warm this city (repeatable).")
+        parser.add_argument("--category", action="append", dest="categories", help="Only warm this category (repeatable).")
+        parser.add_argument("--max-age", type=int, default=None, help="Rebuild snapshots older than this many seconds. Defaults to half of FEED_SNAPSHOT_MAX_AGE.")
+        parser.add_argument("--force", action="store_true", help="Rebuild every snapshot regardless of age.")
+        parser.add_argument("--every", type=int, default=None, help="Keep running and warm again every N seconds (scheduler mode).")
+
+    def handle(self, *args, **options):
+        while True:
+            self.warm(options)
+
+            if not options["every"]:
+                break
+
+            close_old_connections()
+            time.sleep(options["every"])
+
+    def get_categories(self, options) -> list:
+        if options["categories"]:
+            return options["categories"]
+
+        categories = list(settings.DEFAULT_PLACE_CATEGORIES)
+        categories.extend(Category.objects.exclude(name__in=categories).values_list("name", flat=True))
+        return categories
+
+    def warm(self, options):
+        cities = City.objects.all()
+        if options["cities"]:
+            cities = cities.filter(name__in=options["cities"])
+
+        categories = self.get_categories(options)
+        max_age = 0 if options["force"] else (options["max_age"] or settings.FEED_SNAPSHOT_MAX_AGE // 2)
+        feed = Feed()
+
+        for city in cities:
+            stale_categories = get_stale_feed_snapshot_categories(city, categories, max_age=max_age)
+            if not stale_categories:
+                continue
+
+            # snapshots are stamped as refreshed now, so they must not be built from stale cache entries
+            with low_priority():
+                places_by_category = feed.search_places_nearby_for_interests(
+                    city_location=(city.latitude, city.longitude),
+                    interests=stale_categories,
+                    fresh=True,
+                )
+            for category, results in places_by_category.items():
+                snapshot = save_feed_snapshot(city, category, results)
+                self.stdout.write(f"{city.name} / {category}: {len(results)} places (v{snapshot.version})")
+
+            missed = len(stale_categories) - len(places_by_category)
+            if missed:
+                self.stderr.write(f"{city.name}: {missed} categories failed, they will be retried on the next run")
+
+        self.stdout.write(self.style.SUCCESS("Feed snapshots are warm"))
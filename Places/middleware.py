@@ -0,0 +1,13 @@
+from django.conf import settings
+from .deadlines import request_deadline
+
+
+class UpstreamDeadlineMiddleware:
+    """Every request gets UPSTREAM_REQUEST_DEADLINE seconds in total for its calls to Google, retries included."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_deadline(settings.UPSTREAM_REQUEST_DEADLINE):
+            return self.get_response(request)
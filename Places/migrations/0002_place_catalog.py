@@ -0,0 +1,80 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Places', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('place_id', models.CharField(max_length=255, unique=True)),
+                ('city_name', models.CharField(blank=True, default='', max_length=255)),
+                ('name', models.CharField(blank=True, default='', max_length=255)),
+                ('address', models.CharField(blank=True, default='', max_length=500)),
+                ('rating', models.FloatField(blank=True, null=True)),
+                ('phone', models.CharField(blank=True, max_length=50, null=True)),
+                ('map_directions', models.CharField(blank=True, max_length=1000, null=True)),
+                ('write_a_review_url', models.CharField(blank=True, max_length=1000, null=True)),
+                ('reviews', models.JSONField(blank=True, default=list, help_text='Reviews exactly as returned by the Places API')),
+                ('nearby_photo_reference', models.CharField(blank=True, help_text='Photo reference of the first photo returned by nearby search', max_length=1000, null=True)),
+                ('summary_refreshed_at', models.DateTimeField(blank=True, help_text='When name, address, rating and photos were last fetched from place details', null=True)),
+                ('details_refreshed_at', models.DateTimeField(blank=True, help_text='When every place detail field was last fetched', null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlaceOpeningHours',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_now', models.BooleanField(blank=True, null=True)),
+                ('weekday_descriptions', models.JSONField(blank=True, default=list)),
+                ('current_opening_hours', models.JSONField(blank=True, help_text='currentOpeningHours exactly as returned by the Places API', null=True)),
+                ('place', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='opening_hours', to='Places.place')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PlacePhoto',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Places v1 photo resource name', max_length=1000)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='photos', to='Places.place')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlaceSearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('city_name', models.CharField(max_length=255)),
+                ('keyword', models.CharField(max_length=255)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('refreshed_at', models.DateTimeField()),
+                ('place', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_results', to='Places.place')),
+            ],
+            options={
+                'ordering': ['position'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='placephoto',
+            constraint=models.UniqueConstraint(fields=('place', 'position'), name='unique_place_photo_position'),
+        ),
+        migrations.AddIndex(
+            model_name='placesearchresult',
+            index=models.Index(fields=['city_name', 'keyword', 'position'], name='place_search_lookup_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='placesearchresult',
+            constraint=models.UniqueConstraint(fields=('city_name', 'keyword', 'place'), name='unique_place_search_result'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Places', '0002_place_catalog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FeedSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(max_length=255)),
+                ('version', models.PositiveIntegerField(default=1, help_text='Bumped every time the snapshot is rebuilt')),
+                ('format_version', models.PositiveSmallIntegerField(help_text='Layout of the compressed payload')),
+                ('payload', models.BinaryField(help_text='zlib compressed json list of nearby search results')),
+                ('refreshed_at', models.DateTimeField()),
+                ('city', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_snapshots', to='Places.city')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='feedsnapshot',
+            constraint=models.UniqueConstraint(fields=('city', 'category'), name='unique_feed_snapshot'),
+        ),
+    ]
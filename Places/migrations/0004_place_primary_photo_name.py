@@ -0,0 +1,18 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Places', '0003_feedsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='place',
+            name='primary_photo_name',
+            field=models.CharField(blank=True, help_text='Places v1 name of the first photo, kept on the row so summaries need no join', max_length=1000, null=True),
+        ),
+    ]
@@ -7,3 +7,107 @@ class City(models.Model):
 
     def __str__(self):
         return self.name
+
+class Place(models.Model):
+    place_id = models.CharField(max_length=255, unique=True)
+    city_name = models.CharField(max_length=255, blank=True, default='')
+    name = models.CharField(max_length=255, blank=True, default='')
+    address = models.CharField(max_length=500, blank=True, default='')
+    rating = models.FloatField(null=True, blank=True)
+    phone = models.CharField(max_length=50, null=True, blank=True)
+    map_directions = models.CharField(max_length=1000, null=True, blank=True)
+    write_a_review_url = models.CharField(max_length=1000, null=True, blank=True)
+    reviews = models.JSONField(default=list, blank=True, help_text="Reviews exactly as returned by the Places API")
+    nearby_photo_reference = models.CharField(max_length=1000, null=True, blank=True, help_text="Photo reference of the first photo returned by nearby search")
+    primary_photo_name = models.CharField(max_length=1000, null=True, blank=True, help_text="Places v1 name of the first photo, kept on the row so summaries need no join")
+
+    summary_refreshed_at = models.DateTimeField(null=True, blank=True, help_text="When name, address, rating and photos were last fetched from place details")
+    details_refreshed_at = models.DateTimeField(null=True, blank=True, help_text="When every place detail field was last fetched")
+
+    def __str__(self):
+        return self.name or self.place_id
+
+    def as_places_api_summary_payload(self) -> dict:
+        # just enough of the Places v1 response for the saved place summary
+        payload = {
+            "id": self.place_id,
+            "displayName": {"text": self.name},
+            "formattedAddress": self.address,
+            "photos": [{"name": self.primary_photo_name}] if self.primary_photo_name else [],
+        }
+        if self.rating is not None:
+            payload["rating"] = self.rating
+        return payload
+
+    def as_places_api_payload(self) -> dict:
+        # rebuild the Places v1 response so catalog rows are shaped like live responses
+        payload = {
+            "id": self.place_id,
+            "displayName": {"text": self.name},
+            "formattedAddress": self.address,
+            "photos": [{"name": photo.name} for photo in self.photos.all()],
+            "googleMapsLinks": {
+                "directionsUri": self.map_directions,
+                "writeAReviewUri": self.write_a_review_url,
+            },
+            "internationalPhoneNumber": self.phone,
+            "reviews": self.reviews,
+        }
+        if self.rating is not None:
+            payload["rating"] = self.rating
+
+        try:
+            payload["currentOpeningHours"] = self.opening_hours.current_opening_hours
+        except PlaceOpeningHours.DoesNotExist:
+            payload["currentOpeningHours"] = None
+
+        return payload
+
+class PlacePhoto(models.Model):
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='photos')
+    name = models.CharField(max_length=1000, help_text="Places v1 photo resource name")
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['place', 'position'], name='unique_place_photo_position'),
+        ]
+
+class PlaceOpeningHours(models.Model):
+    place = models.OneToOneField(Place, on_delete=models.CASCADE, related_name='opening_hours')
+    open_now = models.BooleanField(null=True, blank=True)
+    weekday_descriptions = models.JSONField(default=list, blank=True)
+    current_opening_hours = models.JSONField(null=True, blank=True, help_text="currentOpeningHours exactly as returned by the Places API")
+
+class PlaceSearchResult(models.Model):
+    place = models.ForeignKey(Place, on_delete=models.CASCADE, related_name='search_results')
+    city_name = models.CharField(max_length=255)
+    keyword = models.CharField(max_length=255)
+    position = models.PositiveSmallIntegerField(default=0)
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ['position']
+        constraints = [
+            models.UniqueConstraint(fields=['city_name', 'keyword', 'place'], name='unique_place_search_result'),
+        ]
+        indexes = [
+            models.Index(fields=['city_name', 'keyword', 'position'], name='place_search_lookup_idx'),
+        ]
+
+class FeedSnapshot(models.Model):
+    city = models.ForeignKey(City, on_delete=models.CASCADE, related_name='feed_snapshots')
+    category = models.CharField(max_length=255)
+    version = models.PositiveIntegerField(default=1, help_text="Bumped every time the snapshot is rebuilt")
+    format_version = models.PositiveSmallIntegerField(help_text="Layout of the compressed payload")
+    payload = models.BinaryField(help_text="zlib compressed json list of nearby search results")
+    refreshed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['city', 'category'], name='unique_feed_snapshot'),
+        ]
+
+    def __str__(self):
+        return f"{self.city} - {self.category} (v{self.version})"
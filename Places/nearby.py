@@ -0,0 +1,39 @@
+import hashlib
+import re
+from django.conf import settings
+from .cache import TieredCache
+
+NEARBY_SEARCH_RADIUS = 5000
+
+# raw places_nearby results shared by the feed, search and ai guide paths
+nearby_search_cache = TieredCache(
+    namespace="nearby_search",
+    ttl=settings.NEARBY_SEARCH_CACHE_TTL,
+    local_max_size=settings.NEARBY_SEARCH_LOCAL_CACHE_SIZE,
+    local_ttl=settings.NEARBY_SEARCH_LOCAL_CACHE_TTL,
+    stale_ttl=settings.NEARBY_SEARCH_CACHE_STALE_TTL,
+)
+
+
+def singularize_word(word: str) -> str:
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and re.search(r"(ss|sh|ch|x|z)es$", word):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def normalize_search_keyword(keyword: str) -> str:
+    """`" Coffee  Shops"`, `"coffee shop"` and `"Coffee-Shop"` all normalize to `"coffee shop"`."""
+    words = re.sub(r"[^\w&]+", " ", keyword.lower()).split()
+    return " ".join(singularize_word(word) for word in words)
+
+
+def make_nearby_search_cache_key(city_location: tuple, keyword: str, radius: int = NEARBY_SEARCH_RADIUS) -> str:
+    # ~11m of rounding, different Decimal/float representations of a city hit the same entry
+    latitude, longitude = (round(float(coordinate), 4) for coordinate in city_location)
+    # keywords are free text, hashed so the key stays short and free of spaces for every cache backend
+    keyword_hash = hashlib.sha1(normalize_search_keyword(keyword).encode("utf-8")).hexdigest()
+    return nearby_search_cache.make_key(f"{latitude},{longitude}", radius, keyword_hash)
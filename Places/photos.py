@@ -0,0 +1,189 @@
+import hashlib
+import io
+import re
+import requests
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import urlencode
+from PIL import Image, UnidentifiedImageError
+from .cache import SingleFlight, TieredCache, MISSING
+from .clients import get_places_session, get_places_request_timeout
+from .exceptions import (
+    PlaceNotFound, PlacePhotoUnreadable, PlacesRequestError, PlacesTransientError, classify_places_error_response
+)
+from .quota import acquire_upstream_quota
+from .breakers import get_circuit_breaker
+
+# longest edge in pixels of every variant we serve
+PLACE_PHOTO_VARIANTS = {
+    "thumbnail": 200,
+    "card": 400,
+    "full": 1200,
+}
+PLACE_PHOTO_DEFAULT_VARIANT = "card"
+
+# legacy photo_reference from nearby search, and the v1 photo resource name from place details
+PLACE_PHOTO_REFERENCE = "ref"
+PLACE_PHOTO_NAME = "name"
+
+PLACE_PHOTO_SOURCE_PATTERNS = {
+    PLACE_PHOTO_REFERENCE: re.compile(r"^[A-Za-z0-9_-]{10,2000}$"),
+    PLACE_PHOTO_NAME: re.compile(r"^places/[A-Za-z0-9_-]+/photos/[A-Za-z0-9_-]+$"),
+}
+
+# query parameter holding the signature of the photo source, only signed urls may fetch from google
+PLACE_PHOTO_SIGNATURE = "sig"
+
+# bump when proxy urls change shape, feed ETags include it so clients drop feeds holding the old urls
+PLACE_PHOTO_URL_VERSION = 2
+
+# failures that will happen again for the same source, remembered so a bad source costs one google call
+PLACE_PHOTO_PERMANENT_ERRORS = (PlaceNotFound, PlacesRequestError, PlacePhotoUnreadable)
+
+_fetches = SingleFlight()
+
+# photo sources that failed for good, by source hash
+place_photo_failure_cache = TieredCache(
+    namespace="place_photo_failure",
+    ttl=settings.PLACE_NOT_FOUND_CACHE_TTL,
+    local_max_size=settings.PLACE_DETAILS_LOCAL_CACHE_SIZE,
+    local_ttl=settings.PLACE_NOT_FOUND_CACHE_TTL,
+)
+
+
+def get_place_photo_storage():
+    return FileSystemStorage(location=settings.PLACE_PHOTO_CACHE_DIR)
+
+
+def is_valid_place_photo_source(source_type: str, source_id: str) -> bool:
+    pattern = PLACE_PHOTO_SOURCE_PATTERNS.get(source_type)
+    return bool(pattern and source_id and pattern.match(source_id))
+
+
+def sign_place_photo_source(source_type: str, source_id: str) -> str:
+    return salted_hmac("place-photo", f"{source_type}:{source_id}").hexdigest()[:32]
+
+
+def is_signed_place_photo_source(source_type: str, source_id: str, signature: str) -> bool:
+    return bool(signature) and constant_time_compare(signature, sign_place_photo_source(source_type, source_id))
+
+
+def build_place_photo_url(source_type: str, source_id: str, variant: str = PLACE_PHOTO_DEFAULT_VARIANT) -> str:
+    path = reverse("place-photo", kwargs={"variant": variant})
+    query = urlencode({source_type: source_id, PLACE_PHOTO_SIGNATURE: sign_place_photo_source(source_type, source_id)})
+    return f"{settings.PLACE_PHOTO_PROXY_BASE_URL}{path}?{query}"
+
+
+def get_source_hash(source_type: str, source_id: str) -> str:
+    return hashlib.sha256(f"{source_type}:{source_id}".encode("utf-8")).hexdigest()
+
+
+def get_source_index_path(source_type: str, source_id: str) -> str:
+    source_hash = get_source_hash(source_type, source_id)
+    return f"sources/{source_hash[:2]}/{source_hash}"
+
+
+def get_variant_path(content_hash: str, variant: str) -> str:
+    return f"variants/{content_hash[:2]}/{content_hash}/{variant}.jpg"
+
+
+def get_place_photo_etag(content_hash: str, variant: str) -> str:
+    return f'"{content_hash[:32]}-{variant}"'
+
+
+def fetch_place_photo(source_type: str, source_id: str) -> bytes:
+    return get_circuit_breaker("photo").call(fetch_place_photo_once, source_type, source_id)
+
+
+def fetch_place_photo_once(source_type: str, source_id: str) -> bytes:
+    largest = max(PLACE_PHOTO_VARIANTS.values())
+    if source_type == PLACE_PHOTO_REFERENCE:
+        url = f"{settings.GOOGLE_MAPS_BASE_URL}/maps/api/place/photo"
+        params = {"maxwidth": largest, "photo_reference": source_id, "key": settings.GOOGLE_API_KEY}
+    else:
+        url = f"{settings.GOOGLE_PLACES_BASE_URL}/{source_id}/media"
+        params = {"maxWidthPx": largest, "maxHeightPx": largest, "key": settings.GOOGLE_API_KEY}
+
+    acquire_upstream_quota("photo")
+    try:
+        response = get_places_session().get(url, params=params, timeout=get_places_request_timeout())
+    except requests.RequestException as error:
+        raise PlacesTransientError(str(error)) from error
+
+    if not response.ok:
+        try:
+            response_data = response.json()
+        except ValueError:
+            response_data = {}
+        raise classify_places_error_response(response.status_code, response_data)
+
+    if not response.headers.get("Content-Type", "").startswith("image/"):
+        raise PlaceNotFound("Photo source did not return an image")
+
+    return response.content
+
+
+def resize_place_photo(content: bytes, size: int) -> bytes:
+    output = io.BytesIO()
+    try:
+        image = Image.open(io.BytesIO(content))
+        image.thumbnail((size, size))
+        image.convert("RGB").save(output, format="JPEG", quality=85, optimize=True)
+    # not an image, a truncated one (both OSErrors) or one too large to decode safely
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as error:
+        raise PlacePhotoUnreadable(f"Photo source returned an unreadable image: {error}") from error
+    return output.getvalue()
+
+
+def store_place_photo(source_type: str, source_id: str) -> str:
+    storage = get_place_photo_storage()
+    content = fetch_place_photo(source_type, source_id)
+
+    # variants are addressed by the original's content, photos shared by several places are stored once
+    content_hash = hashlib.sha256(content).hexdigest()
+    for variant, size in PLACE_PHOTO_VARIANTS.items():
+        variant_path = get_variant_path(content_hash, variant)
+        if not storage.exists(variant_path):
+            storage.save(variant_path, ContentFile(resize_place_photo(content, size)))
+
+    index_path = get_source_index_path(source_type, source_id)
+    if not storage.exists(index_path):
+        storage.save(index_path, ContentFile(content_hash.encode("utf-8")))
+    return content_hash
+
+
+def get_stored_place_photo_content_hash(source_type: str, source_id: str) -> str | None:
+    """Content hash of the cached photo, None when it was never fetched."""
+    storage = get_place_photo_storage()
+    index_path = get_source_index_path(source_type, source_id)
+    if not storage.exists(index_path):
+        return None
+    with storage.open(index_path) as index_file:
+        return index_file.read().decode("utf-8").strip()
+
+
+def get_place_photo_content_hash(source_type: str, source_id: str) -> str:
+    """Content hash of the cached photo, fetching and resizing it on first use."""
+    content_hash = get_stored_place_photo_content_hash(source_type, source_id)
+    if content_hash is not None:
+        return content_hash
+
+    failure_key = place_photo_failure_cache.make_key(get_source_hash(source_type, source_id))
+    failure = place_photo_failure_cache.get(failure_key, MISSING)
+    if failure is not MISSING:
+        error_type, message = failure
+        raise error_type(message)
+
+    try:
+        return _fetches.do(get_source_index_path(source_type, source_id), lambda: store_place_photo(source_type, source_id))
+    except PLACE_PHOTO_PERMANENT_ERRORS as error:
+        place_photo_failure_cache.set(failure_key, (type(error), str(error)))
+        raise
+
+
+def read_place_photo_variant(content_hash: str, variant: str) -> bytes:
+    with get_place_photo_storage().open(get_variant_path(content_hash, variant)) as variant_file:
+        return variant_file.read()
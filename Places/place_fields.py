@@ -0,0 +1,87 @@
+PLACE_DETAILS_FULL = "full"
+PLACE_DETAILS_AI = "ai"
+PLACE_DETAILS_SAVED_PLACE = "saved_place"
+
+# returned by an extractor when the key should be left out of the response
+SKIP = object()
+
+
+def _photos(request_data, photo_url):
+    return [{"url": photo_url(photo["name"])} for photo in request_data.get("photos", [])]
+
+
+def _first_photo(request_data, photo_url):
+    photos = request_data.get("photos", [])
+    if not photos:
+        return SKIP
+    return photo_url(photos[0]["name"])
+
+
+def _reviews(request_data, photo_url):
+    if not request_data.get("reviews"):
+        return SKIP
+    return [
+        {
+            "author": review.get("authorAttribution", {}).get("displayName", ""),
+            "text": review.get("text", ""),
+            "rating": review.get("rating", ""),
+            "author_image": review.get("authorAttribution", {}).get("photoUri", ""),
+            "publish_time": review.get("publishTime", "")
+        } for review in request_data["reviews"] if review.get("text") and review.get("rating")
+    ]
+
+
+def _write_a_review_url(request_data, photo_url):
+    # only offered next to the reviews themselves
+    if not request_data.get("reviews"):
+        return SKIP
+    return request_data.get("googleMapsLinks", {}).get("writeAReviewUri")
+
+
+# response key -> (Places v1 fields it is built from, extractor)
+PLACE_DETAIL_FIELDS = {
+    "place_id": (["id"], lambda request_data, photo_url: request_data.get("id", "")),
+    "name": (["displayName"], lambda request_data, photo_url: request_data.get("displayName", {}).get("text", "")),
+    "address": (["formattedAddress"], lambda request_data, photo_url: request_data.get("formattedAddress", "")),
+    "rating": (["rating"], lambda request_data, photo_url: request_data.get("rating", "")),
+    "photos": (["photos"], _photos),
+    "image": (["photos"], _first_photo),
+    "opening_hours": (["currentOpeningHours"], lambda request_data, photo_url: request_data.get("currentOpeningHours")),
+    "map_directions": (["googleMapsLinks"], lambda request_data, photo_url: request_data.get("googleMapsLinks", {}).get("directionsUri")),
+    "phone": (["internationalPhoneNumber"], lambda request_data, photo_url: request_data.get("internationalPhoneNumber")),
+    "reviews": (["reviews"], _reviews),
+    "write_a_review_url": (["reviews", "googleMapsLinks"], _write_a_review_url),
+}
+
+# the response keys each call mode returns, in response order
+PLACE_DETAILS_MODE_FIELDS = {
+    PLACE_DETAILS_FULL: [
+        "place_id", "name", "address", "rating", "photos", "opening_hours",
+        "map_directions", "phone", "reviews", "write_a_review_url",
+    ],
+    PLACE_DETAILS_AI: [
+        "place_id", "name", "address", "rating", "photos", "opening_hours",
+        "map_directions", "phone",
+    ],
+    PLACE_DETAILS_SAVED_PLACE: [
+        "place_id", "name", "address", "rating", "image",
+    ],
+}
+
+
+def get_place_details_field_mask(mode: str) -> str:
+    fields = []
+    for key in PLACE_DETAILS_MODE_FIELDS[mode]:
+        for field in PLACE_DETAIL_FIELDS[key][0]:
+            if field not in fields:
+                fields.append(field)
+    return ",".join(fields)
+
+
+def shape_place_details(request_data: dict, mode: str, photo_url) -> dict:
+    place_data = {}
+    for key in PLACE_DETAILS_MODE_FIELDS[mode]:
+        value = PLACE_DETAIL_FIELDS[key][1](request_data, photo_url)
+        if value is not SKIP:
+            place_data[key] = value
+    return place_data
@@ -0,0 +1,175 @@
+import asyncio
+import contextvars
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from .exceptions import UpstreamQuotaExhausted
+from .deadlines import cap_timeout
+
+PRIORITY_HIGH = "high"
+PRIORITY_LOW = "low"
+
+# call type -> (bucket, tokens it costs)
+UPSTREAM_CALL_COSTS = {
+    "nearby": ("google", 2),
+    "details": ("google", 1),
+    "photo": ("google", 1),
+    "llm": ("openai", 1),
+}
+
+# longest a caller spins for another process's hold on a bucket, and how long a crashed holder can keep it
+QUOTA_LOCK_WAIT = 0.05
+QUOTA_LOCK_TIMEOUT = 1
+# an untouched bucket is full again after a second, its entry only needs to outlive that
+QUOTA_BUCKET_TIMEOUT = 60
+
+# user facing requests run at high priority, prefetch/warm-up/background refreshes opt into low
+upstream_priority = contextvars.ContextVar("upstream_priority", default=PRIORITY_HIGH)
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+
+@contextmanager
+def low_priority():
+    token = upstream_priority.set(PRIORITY_LOW)
+    try:
+        yield
+    finally:
+        upstream_priority.reset(token)
+
+
+def submit_with_context(executor, function, *args, **kwargs):
+    """executor.submit that carries the caller's context (priority, deadline) into the worker thread."""
+    return executor.submit(contextvars.copy_context().run, function, *args, **kwargs)
+
+
+def record_metric(bucket: str, name: str, amount=1):
+    with _metrics_lock:
+        bucket_metrics = _metrics.setdefault(bucket, {"granted": 0, "tokens": 0, "delayed": 0, "shed": 0, "wait_seconds": 0.0})
+        bucket_metrics[name] += amount
+
+
+def get_max_wait(priority: str) -> float:
+    if priority == PRIORITY_LOW:
+        max_wait = settings.UPSTREAM_QUOTA_LOW_PRIORITY_MAX_WAIT
+    else:
+        max_wait = settings.UPSTREAM_QUOTA_MAX_WAIT
+    # never queue past the request deadline
+    return cap_timeout(max_wait)
+
+
+@contextmanager
+def bucket_lock(bucket: str):
+    """
+    Serializes read-modify-write of a bucket across processes with a short lease in the shared cache.
+    Yields whether the lease was taken, callers retry later when it wasn't.
+    """
+    lock_key = f"upstream_quota:{bucket}:lock"
+    lock_token = uuid.uuid4().hex
+    deadline = time.monotonic() + QUOTA_LOCK_WAIT
+    while not cache.add(lock_key, lock_token, timeout=QUOTA_LOCK_TIMEOUT):
+        if time.monotonic() >= deadline:
+            yield False
+            return
+        time.sleep(0.001)
+
+    try:
+        yield True
+    finally:
+        if cache.get(lock_key) == lock_token:
+            cache.delete(lock_key)
+
+
+def get_bucket_tokens(bucket: str, rate: float, now: float) -> float:
+    """Tokens in the bucket at `now`, refilled at `rate` per second since it was last written, up to `rate`."""
+    tokens, updated_at = cache.get(f"upstream_quota:{bucket}", (rate, now))
+    return min(rate, tokens + max(now - updated_at, 0) * rate)
+
+
+def try_acquire(bucket: str, cost: int, priority: str) -> float:
+    """
+    Takes `cost` tokens from the bucket shared by every process. The bucket refills continuously at
+    UPSTREAM_QUOTA_PER_SECOND and holds at most one second of tokens, so no burst exceeds that.
+    Returns 0 when granted, otherwise how long to wait until enough tokens are back.
+    """
+    rate = settings.UPSTREAM_QUOTA_PER_SECOND[bucket]
+    # low priority work may not take the tokens kept for user requests, so it is shed before they are
+    reserve = 0 if priority != PRIORITY_LOW else rate * (1 - settings.UPSTREAM_QUOTA_LOW_PRIORITY_SHARE)
+
+    with bucket_lock(bucket) as locked:
+        if not locked:
+            return QUOTA_LOCK_WAIT + random.uniform(0, 0.01)
+
+        now = time.time()
+        tokens = get_bucket_tokens(bucket, rate, now)
+        if tokens - cost >= reserve:
+            cache.set(f"upstream_quota:{bucket}", (tokens - cost, now), timeout=QUOTA_BUCKET_TIMEOUT)
+            return 0
+
+    return (cost + reserve - tokens) / rate + random.uniform(0, 0.05)
+
+
+def acquire_upstream_quota(call_type: str):
+    bucket, cost = UPSTREAM_CALL_COSTS[call_type]
+    priority = upstream_priority.get()
+    max_wait = get_max_wait(priority)
+    waited = 0.0
+
+    while True:
+        wait_for = try_acquire(bucket, cost, priority)
+        if not wait_for:
+            break
+        if waited + wait_for > max_wait:
+            record_metric(bucket, "shed")
+            raise UpstreamQuotaExhausted(f"Outbound {bucket} quota exhausted for {call_type} ({priority} priority)")
+        time.sleep(wait_for)
+        waited += wait_for
+
+    record_metric(bucket, "granted")
+    record_metric(bucket, "tokens", cost)
+    if waited:
+        record_metric(bucket, "delayed")
+        record_metric(bucket, "wait_seconds", waited)
+
+
+async def acquire_upstream_quota_async(call_type: str):
+    bucket, cost = UPSTREAM_CALL_COSTS[call_type]
+    priority = upstream_priority.get()
+    max_wait = get_max_wait(priority)
+    waited = 0.0
+
+    while True:
+        # the shared cache is a blocking client, keep its round trips off the event loop
+        wait_for = await sync_to_async(try_acquire, thread_sensitive=False)(bucket, cost, priority)
+        if not wait_for:
+            break
+        if waited + wait_for > max_wait:
+            record_metric(bucket, "shed")
+            raise UpstreamQuotaExhausted(f"Outbound {bucket} quota exhausted for {call_type} ({priority} priority)")
+        await asyncio.sleep(wait_for)
+        waited += wait_for
+
+    record_metric(bucket, "granted")
+    record_metric(bucket, "tokens", cost)
+    if waited:
+        record_metric(bucket, "delayed")
+        record_metric(bucket, "wait_seconds", waited)
+
+
+def get_upstream_quota_metrics() -> dict:
+    """Per-bucket counters for this process plus the tokens left in each shared bucket."""
+    now = time.time()
+    with _metrics_lock:
+        metrics = {bucket: dict(bucket_metrics) for bucket, bucket_metrics in _metrics.items()}
+
+    for bucket, capacity in settings.UPSTREAM_QUOTA_PER_SECOND.items():
+        bucket_metrics = metrics.setdefault(bucket, {"granted": 0, "tokens": 0, "delayed": 0, "shed": 0, "wait_seconds": 0.0})
+        bucket_metrics["capacity_per_second"] = capacity
+        bucket_metrics["tokens_available"] = round(get_bucket_tokens(bucket, capacity, now), 2)
+    return metrics
@@ -0,0 +1,66 @@
+import logging
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.db.models import Count, F, Q
+from django.utils import timezone
+from User.models import UserSavedPlace
+from .catalog import ingest_place_details
+from .exceptions import PlacesUpstreamError
+from .models import Place
+from .place_fields import PLACE_DETAILS_SAVED_PLACE
+from .quota import low_priority, submit_with_context
+from .utils import Feed
+
+logger = logging.getLogger(__name__)
+
+
+def get_saved_place_summary_fresh_since():
+    return timezone.now() - timedelta(seconds=settings.SAVED_PLACE_SUMMARY_MAX_AGE)
+
+
+def link_saved_places_to_catalog() -> int:
+    """Point saved places created before the catalog existed at their Place row."""
+    unlinked = UserSavedPlace.objects.filter(catalog_place__isnull=True)
+    place_ids = set(unlinked.values_list("place_id", flat=True))
+    if not place_ids:
+        return 0
+
+    Place.objects.bulk_create([Place(place_id=place_id) for place_id in place_ids], ignore_conflicts=True)
+    place_pks = dict(Place.objects.filter(place_id__in=place_ids).values_list("place_id", "id"))
+
+    linked = 0
+    for place_id, place_pk in place_pks.items():
+        linked += unlinked.filter(place_id=place_id).update(catalog_place_id=place_pk)
+    return linked
+
+
+def get_saved_places_needing_refresh(limit: int) -> list:
+    # stale or never fetched summaries first, the most saved places first among those
+    return list(
+        Place.objects.annotate(save_count=Count("saves"))
+        .filter(save_count__gt=0)
+        .filter(Q(summary_refreshed_at__isnull=True) | Q(summary_refreshed_at__lt=get_saved_place_summary_fresh_since()))
+        .order_by("-save_count", F("summary_refreshed_at").asc(nulls_first=True))
+        .values_list("place_id", flat=True)[:limit]
+    )
+
+
+def refresh_place_summaries(place_ids: list) -> int:
+    """Fetch the saved place fields for `place_ids` from google and upsert them into the catalog in one go."""
+    feed = Feed()
+
+    def fetch(place_id):
+        try:
+            return feed.request_place_details(place_id=place_id, mode=PLACE_DETAILS_SAVED_PLACE)
+        except PlacesUpstreamError as error:
+            logger.warning("Could not refresh saved place %s: %r", place_id, error)
+            return None
+
+    # background work, shed before user requests when the outbound quota runs short
+    with low_priority(), ThreadPoolExecutor(max_workers=settings.SAVED_PLACE_REFRESH_WORKERS) as executor:
+        futures = [submit_with_context(executor, fetch, place_id) for place_id in place_ids]
+        payloads = [payload for payload in (future.result() for future in futures) if payload]
+
+    ingest_place_details(payloads, PLACE_DETAILS_SAVED_PLACE)
+    return len(payloads)
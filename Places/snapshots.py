@@ -0,0 +1,96 @@
+import json
+import zlib
+from datetime import timedelta
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from .nearby import normalize_search_keyword
+from .models import City, FeedSnapshot
+
+# bump when the payload layout below changes, older snapshots are then ignored until rebuilt
+FEED_SNAPSHOT_FORMAT = 1
+
+
+def pack_nearby_search_results(results: list) -> bytes:
+    # keep only what the feed uses: [place_id, name, rating, photo_reference]
+    rows = []
+    for place in results:
+        photos = place.get("photos") or [{}]
+        rows.append([
+            place["place_id"],
+            place.get("name", ""),
+            place.get("rating"),
+            photos[0].get("photo_reference"),
+        ])
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_nearby_search_results(payload: bytes) -> list:
+    results = []
+    for place_id, name, rating, photo_reference in json.loads(zlib.decompress(bytes(payload))):
+        place = {"place_id": place_id, "name": name}
+        if rating is not None:
+            place["rating"] = rating
+        if photo_reference:
+            place["photos"] = [{"photo_reference": photo_reference}]
+        results.append(place)
+    return results
+
+
+def save_feed_snapshot(city: City, category: str, results: list) -> FeedSnapshot:
+    category = normalize_search_keyword(category)
+    fields = {
+        "format_version": FEED_SNAPSHOT_FORMAT,
+        "payload": pack_nearby_search_results(results),
+        "refreshed_at": timezone.now(),
+    }
+
+    updated = FeedSnapshot.objects.filter(city=city, category=category).update(version=F("version") + 1, **fields)
+    if not updated:
+        FeedSnapshot.objects.create(city=city, category=category, **fields)
+    return FeedSnapshot.objects.get(city=city, category=category)
+
+
+def get_feed_snapshot_results(city_name: str, categories: list) -> dict:
+    """Fresh snapshot results per category, shaped like `places_nearby` results."""
+    if not settings.FEED_SNAPSHOTS_ENABLED or not categories:
+        return {}
+
+    categories_by_normalized = {normalize_search_keyword(category): category for category in categories}
+    snapshots = FeedSnapshot.objects.filter(
+        city__name=city_name,
+        category__in=categories_by_normalized,
+        format_version=FEED_SNAPSHOT_FORMAT,
+        refreshed_at__gte=timezone.now() - timedelta(seconds=settings.FEED_SNAPSHOT_MAX_AGE),
+    ).only("category", "payload")
+
+    return {
+        categories_by_normalized[snapshot.category]: unpack_nearby_search_results(snapshot.payload)
+        for snapshot in snapshots
+    }
+
+
+def get_feed_snapshot_versions(city_name: str, categories: list) -> dict:
+    """Version of the fresh snapshot per category, categories without one are left out."""
+    if not settings.FEED_SNAPSHOTS_ENABLED or not categories:
+        return {}
+
+    categories_by_normalized = {normalize_search_keyword(category): category for category in categories}
+    snapshots = FeedSnapshot.objects.filter(
+        city__name=city_name,
+        category__in=categories_by_normalized,
+        format_version=FEED_SNAPSHOT_FORMAT,
+        refreshed_at__gte=timezone.now() - timedelta(seconds=settings.FEED_SNAPSHOT_MAX_AGE),
+    ).values_list("category", "version")
+
+    return {categories_by_normalized[category]: version for category, version in snapshots}
+
+
+def get_stale_feed_snapshot_categories(city: City, categories: list, max_age: int) -> list:
+    fresh_categories = set(FeedSnapshot.objects.filter(
+        city=city,
+        format_version=FEED_SNAPSHOT_FORMAT,
+        refreshed_at__gte=timezone.now() - timedelta(seconds=max_age),
+    ).values_list("category", flat=True))
+
+    return [category for category in categories if normalize_search_keyword(category) not in fresh_categories]
@@ -0,0 +1,97 @@
+import json
+import logging
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+from .deadlines import request_deadline
+
+logger = logging.getLogger(__name__)
+
+STREAM_NDJSON = "ndjson"
+STREAM_SSE = "sse"
+
+
+def encode_stream_event(stream_format: str, event: str, data: dict) -> bytes:
+    payload = json.dumps(data, separators=(",", ":"), default=str)
+    if stream_format == STREAM_SSE:
+        return f"event: {event}\ndata: {payload}\n\n".encode("utf-8")
+    return f'{{"event":"{event}","data":{payload}}}\n'.encode("utf-8")
+
+
+class StreamEventRenderer(BaseRenderer):
+    """
+    Lets DRF negotiate the streaming formats (`?format=ndjson|sse` or the Accept header).
+    Streamed responses bypass it, it only renders the plain Responses of the same view, e.g. a 404, as one event.
+    """
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get("response")
+        event = "error" if response is not None and response.status_code >= 400 else "message"
+        return encode_stream_event(self.format, event, data or {})
+
+
+class NDJSONRenderer(StreamEventRenderer):
+    media_type = "application/x-ndjson"
+    format = STREAM_NDJSON
+
+
+class EventStreamRenderer(StreamEventRenderer):
+    media_type = "text/event-stream"
+    format = STREAM_SSE
+
+
+STREAM_RENDERERS = [NDJSONRenderer, EventStreamRenderer]
+
+
+def get_stream_format(request) -> str | None:
+    renderer = getattr(request, "accepted_renderer", None)
+    if isinstance(renderer, StreamEventRenderer):
+        return renderer.format
+    return None
+
+
+async def iterate_in_thread(make_iterator):
+    """
+    Runs a blocking iterator on the request's sync thread and yields its items on the event loop as they are produced.
+    That thread holds the request's database connection, a worker of our own would open another one per stream and,
+    on sqlite, wait on the locks of the request's transaction.
+    """
+    done = object()
+
+    # the middleware's deadline ended with the view, the stream gets a budget of its own
+    with request_deadline(settings.UPSTREAM_REQUEST_DEADLINE):
+        iterator = await sync_to_async(make_iterator, thread_sensitive=True)()
+        while True:
+            item = await sync_to_async(next, thread_sensitive=True)(iterator, done)
+            if item is done:
+                return
+            yield item
+
+
+async def stream_feed_events(stream_format: str, make_feed_iterator):
+    count = 0
+    try:
+        async for section, place_data in iterate_in_thread(make_feed_iterator):
+            count += 1
+            yield encode_stream_event(stream_format, "place", {"section": section, "place": place_data})
+    except Exception:
+        logger.exception("Streaming feed failed")
+        yield encode_stream_event(stream_format, "error", {"message": "The feed could not be completed"})
+        return
+
+    yield encode_stream_event(stream_format, "done", {"count": count})
+
+
+def build_feed_stream_response(stream_format: str, make_feed_iterator) -> StreamingHttpResponse:
+    """
+    Streams the ("popular" | "recommended", place) pairs of `make_feed_iterator()` as `place` events,
+    followed by one `done` event. Served incrementally under ASGI, WSGI buffers the whole stream.
+    """
+    content_type = EventStreamRenderer.media_type if stream_format == STREAM_SSE else NDJSONRenderer.media_type
+    response = StreamingHttpResponse(stream_feed_events(stream_format, make_feed_iterator), content_type=content_type)
+    response["Cache-Control"] = "no-cache"
+    # keep nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
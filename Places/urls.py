@@ -1,12 +1,17 @@
 from django.urls import path
 from .views import (
     all_cities, get_user_feed,
-    get_place_details, search_for_places
+    get_place_details, search_for_places,
+    place_photo, get_places_details_batch,
+    upstream_metrics
 )
 
 urlpatterns = [
     path('cities/', all_cities),
     path('feed/<int:city_id>/', get_user_feed),
+    path('place/batch/', get_places_details_batch),
     path('place/<str:place_id>/<str:tag>/', get_place_details),
     path('search/<int:city_id>/', search_for_places),
+    path('photo/<str:variant>/', place_photo, name='place-photo'),
+    path('metrics/upstream/', upstream_metrics),
 ]
\ No newline at end of file
@@ -1,143 +1,474 @@
 import json
-from googlemaps import Client
+import hashlib
+import logging
+import time
+from datetime import timedelta
 from django.conf import settings
+from django.utils import timezone
+from django.utils.cache import parse_etags
 import requests
 import random
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError, as_completed, wait
+from django.db import connection
+from .cache import TieredCache
+from .clients import get_maps_client, get_places_session, get_places_request_timeout
+from .exceptions import (
+    PlacesUpstreamError, PlaceNotFound, PlacesTransientError, MAPS_CLIENT_ERRORS,
+    classify_places_error_response, classify_maps_client_error
+)
+from .catalog import (
+    submit_ingestion, ingest_place_details, ingest_nearby_search_results,
+    get_catalog_nearby_search_results, get_catalog_place_details
+)
+from .nearby import NEARBY_SEARCH_RADIUS, nearby_search_cache, make_nearby_search_cache_key, normalize_search_keyword
+from .photos import PLACE_PHOTO_NAME, PLACE_PHOTO_REFERENCE, PLACE_PHOTO_URL_VERSION, build_place_photo_url
+from .snapshots import get_feed_snapshot_results, get_feed_snapshot_versions
+from .quota import acquire_upstream_quota, submit_with_context
+from .deadlines import cap_timeout, has_time_left
+from .breakers import get_circuit_breaker
+from .place_fields import (
+    PLACE_DETAILS_FULL, PLACE_DETAILS_AI, PLACE_DETAILS_SAVED_PLACE,
+    get_place_details_field_mask, shape_place_details
+)
+
+logger = logging.getLogger(__name__)
+
+# shared by the details endpoint, saved places and the ai guide, entries are keyed by place_id + mode
+place_details_cache = TieredCache(
+    namespace="place_details",
+    ttl=settings.PLACE_DETAILS_CACHE_TTL,
+    local_max_size=settings.PLACE_DETAILS_LOCAL_CACHE_SIZE,
+    local_ttl=settings.PLACE_DETAILS_LOCAL_CACHE_TTL,
+    stale_ttl=settings.PLACE_DETAILS_CACHE_STALE_TTL,
+)
+
+# place ids google reported as unknown, kept briefly so they are not retried on every request
+place_not_found_cache = TieredCache(
+    namespace="place_not_found",
+    ttl=settings.PLACE_NOT_FOUND_CACHE_TTL,
+    local_max_size=settings.PLACE_DETAILS_LOCAL_CACHE_SIZE,
+    local_ttl=settings.PLACE_NOT_FOUND_CACHE_TTL,
+)
+
+def get_place_details_mode(is_ai_request=False, is_saved_place_request=False) -> str:
+    if is_saved_place_request:
+        return PLACE_DETAILS_SAVED_PLACE
+    if is_ai_request:
+        return PLACE_DETAILS_AI
+    return PLACE_DETAILS_FULL
+
+def build_place_details_response(place_data: dict, tag=None, city_name=None) -> dict:
+    # never mutate place_data, it is usually shared through the cache and tag/city_name differ between callers
+    response = {
+        key: place_data[key] for key in ("place_id", "name", "address", "rating")
+    }
+    if tag is not None:
+        response["tag"] = tag
+    if city_name is not None:
+        response["city_name"] = city_name
+    response.update(place_data)
+    return response
+
+def get_feed_ordering_seed(user, city_name: str) -> str:
+    """The same viewer gets the same feed order for a city all day, so repeat opens produce identical responses."""
+    viewer = user.pk if user.is_authenticated else "anonymous"
+    return f"{viewer}:{city_name}:{timezone.localdate().isoformat()}"
+
+def get_feed_etag(feed: dict) -> str:
+    content = json.dumps(feed, sort_keys=True, separators=(",", ":"), default=str)
+    return f'"{hashlib.sha256(content.encode("utf-8")).hexdigest()[:32]}"'
+
+def get_feed_version_etag(city_name: str, user_interests: list, ordering_seed: str) -> str | None:
+    """
+    ETag of the feed get_places_from_google_maps would build, known without building it when every
+    interest is answered from a fresh snapshot: the feed is then fixed by the snapshot versions and
+    the ordering seed. None when any interest still needs the catalog or google.
+    """
+    user_interests = list(dict.fromkeys(user_interests))
+    versions = get_feed_snapshot_versions(city_name, user_interests)
+    if not user_interests or len(versions) < len(user_interests):
+        return None
+
+    state = json.dumps({
+        "city": city_name,
+        "interests": [[interest, versions[interest]] for interest in user_interests],
+        "seed": ordering_seed,
+        # image urls are built from these
+        "photos": [
+            settings.PLACE_PHOTO_PROXY_ENABLED, settings.PLACE_PHOTO_PROXY_BASE_URL, PLACE_PHOTO_URL_VERSION,
+            settings.GOOGLE_MAPS_BASE_URL,
+        ],
+    }, separators=(",", ":"))
+    return f'"v-{hashlib.sha256(state.encode("utf-8")).hexdigest()[:32]}"'
+
+def etag_matches(request, etag: str) -> bool:
+    """Whether the request's If-None-Match holds `etag`, compared weakly as conditional GETs are."""
+    etags = parse_etags(request.headers.get("If-None-Match", ""))
+    if "*" in etags:
+        return True
+    return any(candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in etags)
 
 class Feed:
     def __init__(self):
         self.api_key = settings.GOOGLE_API_KEY
-        self.client = Client(key=self.api_key)
-        self.google_places_base_url = 'https://places.googleapis.com/v1'
+        self.client = get_maps_client()
+        self.session = get_places_session()
+        self.google_places_base_url = settings.GOOGLE_PLACES_BASE_URL
 
     def get_places_from_google_maps_for_ai_request(self, city_name: str, city_location: tuple, extracted_search_interests_from_message: list) -> list:
-        place_ids = set()
-        place_details = []
+        place_ids = []
 
         # search for places based on extracted interests
         for interest in extracted_search_interests_from_message:
-            places = self.client.places_nearby(
-                location=city_location,
-                radius=5000,
-                keyword=interest
-            )
-            for place in places["results"]:
+            try:
+                places = self.search_places_nearby(city_location, interest)
+            except PlacesUpstreamError as error:
+                logger.warning("Nearby search for interest %r failed: %r", interest, error)
+                continue
+            for place in places:
                 if len(place_ids) >= settings.MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST:
                     break
                 if "photos" not in place:
                     continue
-                place_ids.add(place["place_id"])
+                if place["place_id"] not in place_ids:
+                    place_ids.append(place["place_id"])
             if len(place_ids) >= settings.MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST:
                 break
 
         # Fetch details in parallel for efficiency
-        with ThreadPoolExecutor(max_workers=3) as executor:
-            futures = [
-                executor.submit(
-                    self.get_place_details,
-                    place_id=pid,
-                    is_ai_request=True,
-                    city_name=city_name
-                )
-                for pid in place_ids
-            ]
-            for future in as_completed(futures):
-                detail = future.result()
-                if detail:
-                    place_details.append(detail)
+        place_details = self.get_places_details_batch(
+            places=[{"place_id": pid} for pid in place_ids],
+            is_ai_request=True,
+            city_name=city_name
+        )
+        return [detail for detail in place_details if detail]
+
+    def get_places_details_batch(self, places: list, is_ai_request=False, is_saved_place_request=False, city_name=None) -> list:
+        """
+        Details for every {"place_id", "tag"} in `places`, fetched concurrently and
+        returned in the same order. Places that fail or miss the deadline come back as {}.
+        """
+        if not places:
+            return []
 
+        executor = ThreadPoolExecutor(max_workers=min(settings.PLACE_DETAILS_BATCH_MAX_WORKERS, len(places)))
+        futures = [
+            submit_with_context(
+                executor,
+                self.get_place_details_in_worker,
+                place_id=place["place_id"],
+                tag=place.get("tag"),
+                is_ai_request=is_ai_request,
+                is_saved_place_request=is_saved_place_request,
+                city_name=city_name
+            )
+            for place in places
+        ]
+        wait(futures, timeout=cap_timeout(settings.PLACE_DETAILS_BATCH_DEADLINE))
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        place_details = []
+        for place, future in zip(places, futures):
+            if not future.done():
+                logger.warning("Place details for %s missed the batch deadline", place["place_id"])
+                place_details.append({})
+            elif future.exception() is not None:
+                logger.error("Place details for %s failed", place["place_id"], exc_info=future.exception())
+                place_details.append({})
+            else:
+                place_details.append(future.result())
         return place_details
 
-    def get_places_from_google_maps(self, city_name: str, city_location: tuple, user_interests: list, is_search_request=False):
+    def get_place_details_in_worker(self, **kwargs) -> dict:
+        try:
+            return self.get_place_details(**kwargs)
+        finally:
+            # batch worker threads are short lived, don't leave catalog connections behind
+            connection.close()
+
+    def search_places_nearby(self, city_location: tuple, keyword: str) -> list:
+        return nearby_search_cache.get_or_set(
+            make_nearby_search_cache_key(city_location, keyword),
+            lambda: self.request_places_nearby(city_location, keyword)
+        )
+
+    def refresh_places_nearby(self, city_location: tuple, keyword: str) -> list:
+        """Always asks google, skipping stale cache entries, and stores the answer for the next search."""
+        places = self.request_places_nearby(city_location, keyword)
+        nearby_search_cache.set(make_nearby_search_cache_key(city_location, keyword), places)
+        return places
+
+    def request_places_nearby(self, city_location: tuple, keyword: str) -> list:
+        return get_circuit_breaker("nearby").call(self.request_places_nearby_once, city_location, keyword)
+
+    def request_places_nearby_once(self, city_location: tuple, keyword: str) -> list:
+        acquire_upstream_quota("nearby")
+        try:
+            return self.client.places_nearby(
+                location=city_location,
+                radius=NEARBY_SEARCH_RADIUS,
+                keyword=keyword
+            )["results"]
+        except MAPS_CLIENT_ERRORS as error:
+            raise classify_maps_client_error(error) from error
+
+    def search_places_nearby_for_interests(self, city_location: tuple, interests: list, fresh=False) -> dict:
+        return dict(self.iter_search_places_nearby_for_interests(city_location, interests, fresh=fresh))
+
+    def iter_search_places_nearby_for_interests(self, city_location: tuple, interests: list, fresh=False):
+        """
+        Yields (interest, results) as each interest's nearby search finishes, until the feed deadline.
+        With `fresh`, every search goes to google instead of the (possibly stale) nearby search cache.
+        """
+        if not interests:
+            return
+
+        search = self.refresh_places_nearby if fresh else self.search_places_nearby
+        executor = ThreadPoolExecutor(max_workers=min(settings.FEED_SEARCH_MAX_WORKERS, len(interests)))
+        futures = {
+            submit_with_context(executor, search, city_location, interest): interest
+            for interest in interests
+        }
+        pending = set(futures)
+
+        try:
+            for future in as_completed(futures, timeout=cap_timeout(settings.FEED_SEARCH_DEADLINE)):
+                pending.discard(future)
+                interest = futures[future]
+                try:
+                    places = future.result()
+                except Exception:
+                    logger.exception("Nearby search failed for interest %r", interest)
+                    continue
+                yield interest, places
+        except FutureTimeoutError:
+            for future in pending:
+                logger.warning("Nearby search for interest %r missed the feed deadline", futures[future])
+        finally:
+            # don't hold the request for searches that missed the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def iter_places_by_interest(self, city_name: str, city_location: tuple, user_interests: list):
+        """
+        Yields (interest, nearby results) for the feed as soon as each is known: fresh snapshots and
+        catalog results first, then live searches as they finish, then older catalog results for the
+        interests google could not answer.
+        """
+        # answer from precomputed snapshots and the local catalog where they are fresh,
+        # only go to google for the rest
+        places_by_interest = get_feed_snapshot_results(city_name, user_interests)
+        missing_interests = [interest for interest in user_interests if interest not in places_by_interest]
+
+        places_by_interest.update(get_catalog_nearby_search_results(city_name, missing_interests))
+        missing_interests = [interest for interest in missing_interests if interest not in places_by_interest]
+        yield from places_by_interest.items()
+
+        answered_interests = set()
+        for interest, places in self.iter_search_places_nearby_for_interests(city_location, missing_interests):
+            submit_ingestion(("nearby", city_name, normalize_search_keyword(interest)), ingest_nearby_search_results, city_name, interest, places)
+            answered_interests.add(interest)
+            yield interest, places
+        missing_interests = [interest for interest in missing_interests if interest not in answered_interests]
+
+        # google failed or ran out of time for these, older catalog results beat an empty section
+        yield from get_catalog_nearby_search_results(
+            city_name, missing_interests, max_age=settings.PLACE_CATALOG_FALLBACK_MAX_AGE
+        ).items()
+
+    def iter_feed_places(self, city_name: str, interest: str, places: list, seen_place_ids: set):
+        """Yields ("popular" | "recommended", place) for the nearby results of one interest, skipping places already seen."""
+        for place in places:
+            if "photos" not in place or place["place_id"] in seen_place_ids:
+                continue
+            seen_place_ids.add(place["place_id"])
+            try:
+                image_url = self.get_place_photo_reference_url(place["photos"][0]["photo_reference"])
+            except KeyError:
+                continue
+
+            place_rating = place.get("rating", "Not Rated")
+            place_data = {
+                "name": place["name"],
+                "place_id": place["place_id"],
+                "tag": interest,
+                "city_name": city_name,
+                "image": image_url,
+                "rating": place_rating,
+            }
+            try:
+                if place_rating != "Not Rated" and float(place_rating) >= 4.5:
+                    yield "popular", place_data
+                else:
+                    yield "recommended", place_data
+            except (ValueError, TypeError):
+                yield "recommended", place_data
+
+    def get_places_from_google_maps(self, city_name: str, city_location: tuple, user_interests: list, is_search_request=False, ordering_seed=None):
         user_feed = {
             "recommended": [],
             "popular": [],
         }
         seen_place_ids = set()
 
-        for interest in user_interests:
-            places = self.client.places_nearby(
-                location=city_location,
-                radius=5000,
-                keyword=interest
-            )
-            for place in places["results"]:
-                if "photos" not in place or place["place_id"] in seen_place_ids:
-                    continue
-                seen_place_ids.add(place["place_id"])
-                try:
-                    place_image_reference = place["photos"][0]["photo_reference"]
-                    image_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photo_reference={place_image_reference}&key={self.api_key}"
-                except KeyError:
-                    continue
+        user_interests = list(dict.fromkeys(user_interests))
+        places_by_interest = dict(self.iter_places_by_interest(city_name, city_location, user_interests))
 
-                place_rating = place.get("rating", "Not Rated")
-                place_data = {
-                    "name": place["name"],
-                    "place_id": place["place_id"],
-                    "tag": interest,
-                    "city_name": city_name,
-                    "image": image_url,
-                    "rating": place_rating,
-                }
-                try:
-                    if place_rating != "Not Rated" and float(place_rating) >= 4.5:
-                        user_feed["popular"].append(place_data)
-                    else:
-                        user_feed["recommended"].append(place_data)
-                except (ValueError, TypeError):
-                    user_feed["recommended"].append(place_data)
+        # merge in interest order so the same inputs always build the same feed
+        for interest in user_interests:
+            for section, place_data in self.iter_feed_places(city_name, interest, places_by_interest.get(interest, []), seen_place_ids):
+                user_feed[section].append(place_data)
 
         if not is_search_request:
-            random.shuffle(user_feed["recommended"])
-            random.shuffle(user_feed["popular"])
+            # seeded shuffle, still varied between viewers and days but reproducible for the same seed
+            ordering = random.Random(ordering_seed)
+            ordering.shuffle(user_feed["recommended"])
+            ordering.shuffle(user_feed["popular"])
 
         return user_feed
 
+    def iter_places_from_google_maps(self, city_name: str, city_location: tuple, user_interests: list):
+        """
+        Streaming variant of get_places_from_google_maps: yields (section, place) as soon as each
+        interest's results arrive instead of waiting for the slowest one. Places are not shuffled.
+        """
+        seen_place_ids = set()
+        user_interests = list(dict.fromkeys(user_interests))
+
+        for interest, places in self.iter_places_by_interest(city_name, city_location, user_interests):
+            yield from self.iter_feed_places(city_name, interest, places, seen_place_ids)
+
     def get_place_details(self, place_id: str, tag=None, is_ai_request=False, is_saved_place_request=False, city_name=None) -> dict:
+        mode = get_place_details_mode(is_ai_request=is_ai_request, is_saved_place_request=is_saved_place_request)
+
+        if place_not_found_cache.get(place_not_found_cache.make_key(place_id), False):
+            return {}
+
+        cached_place_data = place_details_cache.get_or_set(
+            place_details_cache.make_key(mode, place_id),
+            lambda: self.load_place_details(place_id=place_id, mode=mode),
+            # a stale entry is refreshed from google, the catalog row it came from is no newer
+            refresh_loader=lambda: self.fetch_place_details(place_id=place_id, mode=mode),
+        )
+        if cached_place_data is None:
+            cached_place_data = self.get_fallback_place_details(place_id=place_id, mode=mode)
+        if cached_place_data is None:
+            return {}
+
+        return build_place_details_response(cached_place_data, tag=tag, city_name=city_name)
+
+    def get_fallback_place_details(self, place_id: str, mode: str) -> dict | None:
+        # google failed, timed out or the circuit is open, an older catalog copy beats no details at all
+        if place_not_found_cache.get(place_not_found_cache.make_key(place_id), False):
+            return None
+        return get_catalog_place_details(
+            place_id, mode, photo_url=self.get_place_photo_url, max_age=settings.PLACE_CATALOG_FALLBACK_MAX_AGE
+        )
+
+    def get_saved_places_details(self, saved_places: list, city_name: str) -> list:
+        """
+        Saved place summaries in the order of `saved_places` (UserSavedPlace rows with catalog_place selected).
+        Fresh catalog summaries are used as they are, the rest are fetched as one batch. Failed places are left out.
+        """
+        fresh_since = timezone.now() - timedelta(seconds=settings.SAVED_PLACE_SUMMARY_MAX_AGE)
+        place_details = [None] * len(saved_places)
+        missing = []
+
+        for index, saved_place in enumerate(saved_places):
+            place = saved_place.catalog_place
+            if place is not None and place.summary_refreshed_at and place.summary_refreshed_at >= fresh_since:
+                place_data = shape_place_details(
+                    place.as_places_api_summary_payload(),
+                    PLACE_DETAILS_SAVED_PLACE,
+                    photo_url=self.get_place_photo_url
+                )
+                place_details[index] = build_place_details_response(place_data, tag=saved_place.tag, city_name=city_name)
+            else:
+                missing.append(index)
+
+        fetched_place_details = self.get_places_details_batch(
+            places=[{"place_id": saved_places[index].place_id, "tag": saved_places[index].tag} for index in missing],
+            city_name=city_name,
+            is_saved_place_request=True,
+        )
+        for index, place_data in zip(missing, fetched_place_details):
+            place_details[index] = place_data
+
+        return [place_data for place_data in place_details if place_data]
+
+    def load_place_details(self, place_id: str, mode: str) -> dict | None:
+        # catalog rows only count as fresh as long as a cache entry would, the cache's ttl + stale ttl stay meaningful
+        place_data = get_catalog_place_details(
+            place_id, mode, photo_url=self.get_place_photo_url,
+            max_age=min(settings.PLACE_CATALOG_DETAILS_MAX_AGE, settings.PLACE_DETAILS_CACHE_TTL)
+        )
+        if place_data is None:
+            place_data = self.fetch_place_details(place_id=place_id, mode=mode)
+        return place_data
+
+    def fetch_place_details(self, place_id: str, mode: str) -> dict | None:
         try:
-            request_place_details = requests.get(
-                f"{self.google_places_base_url}/places/{place_id}?fields=*&key={self.api_key}"
+            request_data = self.request_place_details(place_id=place_id, mode=mode)
+        except PlaceNotFound:
+            # remember ids that will never resolve so we stop paying for them on every request
+            place_not_found_cache.set(place_not_found_cache.make_key(place_id), True)
+            return None
+        except PlacesUpstreamError as error:
+            logger.warning("Place details for %s failed: %r", place_id, error)
+            return None
+
+        submit_ingestion(("details", mode, place_id), ingest_place_details, [request_data], mode)
+
+        return shape_place_details(request_data, mode, photo_url=self.get_place_photo_url)
+
+    def request_place_details(self, place_id: str, mode: str) -> dict:
+        breaker = get_circuit_breaker("details")
+        attempt = 0
+        while True:
+            try:
+                return breaker.call(self.request_place_details_once, place_id=place_id, mode=mode)
+            except PlacesTransientError:
+                # exponential backoff with jitter, capped so a request never sleeps for long
+                backoff = min(settings.PLACES_RETRY_BACKOFF * (2 ** attempt), settings.PLACES_RETRY_MAX_BACKOFF)
+                backoff *= random.uniform(0.5, 1)
+
+                # no retry the request deadline can't cover
+                if attempt >= settings.PLACES_TRANSIENT_RETRIES or not has_time_left(backoff + settings.UPSTREAM_MIN_CALL_BUDGET):
+                    raise
+
+            time.sleep(backoff)
+            attempt += 1
+
+    def request_place_details_once(self, place_id: str, mode: str) -> dict:
+        acquire_upstream_quota("details")
+        try:
+            request_place_details = self.session.get(
+                f"{self.google_places_base_url}/places/{place_id}",
+                params={
+                    "fields": get_place_details_field_mask(mode),
+                    "key": self.api_key,
+                },
+                timeout=get_places_request_timeout()
             )
+        except requests.RequestException as error:
+            raise PlacesTransientError(str(error)) from error
+
+        try:
             request_data = request_place_details.json()
-        except Exception:
-            return {}
+        except ValueError:
+            request_data = {}
 
-        place_data = {
-            "place_id": request_data.get("id", ""),
-            "name": request_data.get("displayName", {}).get("text", ""),
-            "address": request_data.get("formattedAddress", ""),
-            "rating": request_data.get("rating", ""),
-        }
-        if tag is not None:
-            place_data["tag"] = tag
-        if city_name is not None:
-            place_data["city_name"] = city_name
-
-        if not is_saved_place_request:
-            place_data["photos"] = [
-                {
-                    "url": f"{self.google_places_base_url}/{photo['name']}/media?key={self.api_key}&maxHeightPx=400&maxWidthPx=400",
-                } for photo in request_data.get("photos", [])
-            ]
-            place_data["opening_hours"] = request_data.get("currentOpeningHours")
-            place_data["map_directions"] = request_data.get("googleMapsLinks", {}).get("directionsUri")
-            place_data["phone"] = request_data.get("internationalPhoneNumber")
-        else:
-            photos = request_data.get("photos", [])
-            if photos:
-                place_data["image"] = f"{self.google_places_base_url}/{photos[0]['name']}/media?key={self.api_key}&maxHeightPx=400&maxWidthPx=400"
-
-        if not is_ai_request and request_data.get("reviews") and not is_saved_place_request:
-            place_data["reviews"] = [
-                {
-                    "author": review.get("authorAttribution", {}).get("displayName", ""),
-                    "text": review.get("text", ""),
-                    "rating": review.get("rating", ""),
-                    "author_image": review.get("authorAttribution", {}).get("photoUri", ""),
-                    "publish_time": review.get("publishTime", "")
-                } for review in request_data["reviews"] if review.get("text") and review.get("rating")
-            ]
-            place_data["write_a_review_url"] = request_data.get("googleMapsLinks", {}).get("writeAReviewUri")
-        return place_data
\ No newline at end of file
+        # error payloads must not end up in the cache as an empty place
+        if not request_place_details.ok:
+            raise classify_places_error_response(request_place_details.status_code, request_data)
+
+        return request_data
+
+    def get_place_photo_url(self, photo_name: str) -> str:
+        if settings.PLACE_PHOTO_PROXY_ENABLED:
+            return build_place_photo_url(PLACE_PHOTO_NAME, photo_name)
+        return f"{self.google_places_base_url}/{photo_name}/media?key={self.api_key}&maxHeightPx=400&maxWidthPx=400"
+
+    def get_place_photo_reference_url(self, photo_reference: str) -> str:
+        if settings.PLACE_PHOTO_PROXY_ENABLED:
+            return build_place_photo_url(PLACE_PHOTO_REFERENCE, photo_reference)
+        return f"{settings.GOOGLE_MAPS_BASE_URL}/maps/api/place/photo?maxwidth=400&photo_reference={photo_reference}&key={self.api_key}"
@@ -5,12 +5,28 @@ from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from .models import City
 from .serializers import CitySerializer
-from rest_framework.permissions import IsAuthenticated
-from rest_framework.decorators import permission_classes
-from .utils import Feed
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
+from rest_framework.decorators import permission_classes, renderer_classes
+from rest_framework.settings import api_settings
+from .utils import Feed, get_feed_ordering_seed, get_feed_etag, get_feed_version_etag, etag_matches
 from User.models import Category
 from django.conf import settings
 from User.models import UserSearchHistory
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.views.decorators.http import require_GET
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from .exceptions import PlaceNotFound, PlacesRequestError, PlacesUpstreamError
+from .clients import get_connection_pool_stats
+from .quota import get_upstream_quota_metrics
+from .streaming import STREAM_NDJSON, STREAM_SSE, STREAM_RENDERERS, get_stream_format, build_feed_stream_response
+from .breakers import get_circuit_breaker_stats
+from .catalog import get_ingestion_stats
+from AiGuide.timings import get_stage_timing_stats
+from .photos import (
+    PLACE_PHOTO_VARIANTS, PLACE_PHOTO_SOURCE_PATTERNS, PLACE_PHOTO_SIGNATURE,
+    is_valid_place_photo_source, is_signed_place_photo_source, get_place_photo_content_hash,
+    get_stored_place_photo_content_hash, get_place_photo_etag, read_place_photo_variant
+)
 
 @swagger_auto_schema(
     method='get',
@@ -57,6 +73,14 @@ def all_cities(request):
             description="Comma-separated list of categories to search for places. If not provided, the user's saved interests will be used. Examlple: `?categories=restaurant,park,museum`",
             type=openapi.TYPE_STRING,
             required=False
+        ),
+        openapi.Parameter(
+            'format',
+            openapi.IN_QUERY,
+            description="`ndjson` or `sse` to stream the places as they are found instead of one response (also selected by `Accept: application/x-ndjson` / `text/event-stream`). Every place is a `place` event with its `section` (`popular` or `recommended`), the stream ends with a `done` event. Streamed places are not shuffled.",
+            type=openapi.TYPE_STRING,
+            enum=[STREAM_NDJSON, STREAM_SSE],
+            required=False
         )
     ],
     responses={
@@ -106,10 +130,11 @@ def all_cities(request):
         401: openapi.Response(description="Unauthorized")
     },
     operation_summary="Get User Feed",
-    operation_description="Returns a categorized list of places ('recommended' and 'popular') based on the user's interests and the specified city. If the `categories` query parameter is provided, it will override the user's saved interests.",
+    operation_description="Returns a categorized list of places ('recommended' and 'popular') based on the user's interests and the specified city. If the `categories` query parameter is provided, it will override the user's saved interests. The order is stable per user, city and day; responses carry an `ETag` and a matching `If-None-Match` is answered with `304 Not Modified`.",
     tags=['Places']
 )
 @api_view(['GET'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + STREAM_RENDERERS)
 # @permission_classes([IsAuthenticated])
 def get_user_feed(request, city_id):
 
@@ -139,7 +164,7 @@ def get_user_feed(request, city_id):
         
         # if user is logged in then get their categories
         if user.is_authenticated:
-            interests = user.interests.values_list('name', flat=True)
+            interests = user.interests.order_by('id').values_list('name', flat=True)
 
             # if user does not have interests selected, return the default interests from settings
             if not interests:
@@ -148,14 +173,46 @@ def get_user_feed(request, city_id):
         # if user is not logged in, return the default interests from settings
         else:
             interests = settings.DEFAULT_PLACE_CATEGORIES
+
+    stream_format = get_stream_format(request)
+    if stream_format:
+        feed = Feed()
+        interests = list(interests)
+        return build_feed_stream_response(stream_format, lambda: feed.iter_places_from_google_maps(
+            city_name=city.name,
+            city_location=(city.latitude, city.longitude),
+            user_interests=interests
+        ))
         
-    get_user_feed = Feed().get_places_from_google_maps(
-        city_name=city.name,
-        city_location=(city.latitude, city.longitude),
-        user_interests=interests
-    )
+    interests = list(interests)
+    ordering_seed = get_feed_ordering_seed(request.user, city.name)
 
-    return Response(get_user_feed, status=status.HTTP_200_OK)
+    # a feed served from snapshots has an ETag before it is built, a matching client gets its 304 without the work
+    etag = get_feed_version_etag(city.name, interests, ordering_seed)
+    if etag is not None and etag_matches(request, etag):
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        get_user_feed = Feed().get_places_from_google_maps(
+            city_name=city.name,
+            city_location=(city.latitude, city.longitude),
+            user_interests=interests,
+            ordering_seed=ordering_seed
+        )
+
+        etag = etag or get_feed_etag(get_user_feed)
+        if etag_matches(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = Response(get_user_feed, status=status.HTTP_200_OK)
+
+    # anonymous feeds are the same for everyone and may be shared, personal ones only revalidated
+    response["ETag"] = etag
+    if request.user.is_authenticated:
+        patch_cache_control(response, private=True, no_cache=True)
+    else:
+        patch_cache_control(response, public=True, max_age=settings.FEED_HTTP_MAX_AGE)
+    patch_vary_headers(response, ["Authorization"])
+    return response
 
 @swagger_auto_schema(
     method='get',
@@ -312,6 +369,14 @@ def get_place_details(request, place_id, tag):
             type=openapi.TYPE_INTEGER,
             required=True,
             description="The ID of the city to search in."
+        ),
+        openapi.Parameter(
+            name='format',
+            in_=openapi.IN_QUERY,
+            description="`ndjson` or `sse` to stream the places as they are found instead of one response (also selected by `Accept: application/x-ndjson` / `text/event-stream`). Every place is a `place` event with its `section` (`popular` or `recommended`), the stream ends with a `done` event. Streamed places are not shuffled.",
+            type=openapi.TYPE_STRING,
+            enum=[STREAM_NDJSON, STREAM_SSE],
+            required=False
         )
     ],
     request_body=openapi.Schema(
@@ -320,7 +385,7 @@ def get_place_details(request, place_id, tag):
         properties={
             'search_query': openapi.Schema(
                 type=openapi.TYPE_STRING,
-                description="Text-based search term (e.g. 'restaurants', 'parks')."
+                description="Text-based search term (e.g. 'restaurants', 'parks'), at most 200 characters by default."
             ),
             'interests': openapi.Schema(
                 type=openapi.TYPE_ARRAY,
@@ -341,7 +406,7 @@ def get_place_details(request, place_id, tag):
                             "place_id": "abcd1234",
                             "tag": "castle",
                             "city_name": "Tirana",
-                            "image": "https://maps.googleapis.com/maps/api/place/photo?...",
+                            "image": "https://api.example.com/api/v1/places/photo/card/?ref=...",
                             "rating": 4.2
                         }
                     ],
@@ -351,18 +416,19 @@ def get_place_details(request, place_id, tag):
                             "place_id": "wxyz5678",
                             "tag": "restaurant",
                             "city_name": "Tirana",
-                            "image": "https://maps.googleapis.com/maps/api/place/photo?...",
+                            "image": "https://api.example.com/api/v1/places/photo/card/?ref=...",
                             "rating": 4.7
                         }
                     ]
                 }
             }
         ),
-        400: openapi.Response(description="Invalid format or no matching interests."),
+        400: openapi.Response(description="Invalid format, overlong search query or no matching interests."),
         404: openapi.Response(description="City not found.")
     }
 )
 @api_view(['POST'])
+@renderer_classes(api_settings.DEFAULT_RENDERER_CLASSES + STREAM_RENDERERS)
 def search_for_places(request, city_id):
 
     try:
@@ -382,6 +448,13 @@ def search_for_places(request, city_id):
             "message": "Please provide either a search query or interests."
         }, status=status.HTTP_400_BAD_REQUEST)
 
+    # the query becomes a catalog keyword and a search history entry, both have bounded columns
+    if search_query and (not isinstance(search_query, str) or len(search_query) > settings.SEARCH_QUERY_MAX_LENGTH):
+        return Response({
+            "status": "error",
+            "message": f"'search_query' must be text of at most {settings.SEARCH_QUERY_MAX_LENGTH} characters."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
     user_interests = []
 
     # add user search query to interests
@@ -421,6 +494,15 @@ def search_for_places(request, city_id):
             # add selected interests to user_interests
             user_interests.extend(categories.values_list('name', flat=True))
 
+    stream_format = get_stream_format(request)
+    if stream_format:
+        feed = Feed()
+        return build_feed_stream_response(stream_format, lambda: feed.iter_places_from_google_maps(
+            city_name=city.name,
+            city_location=(city.latitude, city.longitude),
+            user_interests=user_interests
+        ))
+
     search_result_based_on_query_and_selected_interests = Feed().get_places_from_google_maps(
         city_name=city.name,
         city_location=(city.latitude, city.longitude),
@@ -430,4 +512,183 @@ def search_for_places(request, city_id):
     return Response(
         search_result_based_on_query_and_selected_interests, 
         status=status.HTTP_200_OK
-    )
\ No newline at end of file
+    )
+
+@swagger_auto_schema(
+    method='post',
+    tags=['Places'],
+    operation_summary="Get Place Details in Batch",
+    operation_description=f"""
+    Returns the details of up to {settings.PLACE_DETAILS_BATCH_MAX_SIZE} places in one response, in the order they were requested.
+    Every item has the same shape as the `Get Place Details` response.
+
+    - Places are fetched concurrently, so the batch takes about as long as the slowest place.
+    - A place that cannot be found or fetched is reported on its own item with `status: error`, the rest of the batch is still returned.
+    """,
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        required=['places'],
+        properties={
+            'places': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(
+                    type=openapi.TYPE_OBJECT,
+                    required=['place_id'],
+                    properties={
+                        'place_id': openapi.Schema(type=openapi.TYPE_STRING, description="The Google Place ID"),
+                        'tag': openapi.Schema(type=openapi.TYPE_STRING, description="The tag of the place eg Restaurant"),
+                    }
+                )
+            )
+        }
+    ),
+    responses={
+        200: openapi.Response(
+            description="One result per requested place, in request order.",
+            examples={
+                "application/json": {
+                    "results": [
+                        {
+                            "place_id": "abcd1234",
+                            "status": "success",
+                            "place": {
+                                "place_id": "abcd1234",
+                                "name": "Tirana Castle",
+                                "tag": "castle",
+                            }
+                        },
+                        {
+                            "place_id": "wxyz5678",
+                            "status": "error",
+                            "message": "Place details are not available"
+                        }
+                    ]
+                }
+            }
+        ),
+        400: openapi.Schema(
+            type=openapi.TYPE_OBJECT,
+            properties={
+                "status": openapi.Schema(type=openapi.TYPE_STRING, example="error"),
+                "message": openapi.Schema(type=openapi.TYPE_STRING, example="`places` must be a non-empty list of objects with a `place_id`.")
+            }
+        ),
+    }
+)
+@api_view(['POST'])
+def get_places_details_batch(request):
+
+    places = request.data.get('places')
+
+    if not isinstance(places, list) or not places or not all(
+        isinstance(place, dict) and isinstance(place.get('place_id'), str) and place['place_id'] for place in places
+    ):
+        return Response({
+            "status": "error",
+            "message": "`places` must be a non-empty list of objects with a `place_id`."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    if len(places) > settings.PLACE_DETAILS_BATCH_MAX_SIZE:
+        return Response({
+            "status": "error",
+            "message": f"At most {settings.PLACE_DETAILS_BATCH_MAX_SIZE} places can be requested at once."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    place_details = Feed().get_places_details_batch(places=places)
+
+    results = []
+    for place, place_detail in zip(places, place_details):
+        if place_detail:
+            results.append({
+                "place_id": place["place_id"],
+                "status": "success",
+                "place": place_detail
+            })
+        else:
+            results.append({
+                "place_id": place["place_id"],
+                "status": "error",
+                "message": "Place details are not available"
+            })
+
+    return Response({"results": results}, status=status.HTTP_200_OK)
+
+# plain django view: images are fetched on every scroll, so they skip drf auth and throttling.
+# Photos already stored are served to anyone, only urls signed by the Feed may fetch a new one from google
+@require_GET
+def place_photo(request, variant):
+
+    if variant not in PLACE_PHOTO_VARIANTS:
+        return JsonResponse({
+            "status": "error",
+            "message": f"Variant must be one of: {', '.join(PLACE_PHOTO_VARIANTS)}"
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    source = next(
+        ((source_type, request.GET[source_type]) for source_type in PLACE_PHOTO_SOURCE_PATTERNS if source_type in request.GET),
+        None
+    )
+    if source is None or not is_valid_place_photo_source(*source):
+        return JsonResponse({
+            "status": "error",
+            "message": "A valid `ref` or `name` query parameter is required."
+        }, status=status.HTTP_400_BAD_REQUEST)
+
+    content_hash = get_stored_place_photo_content_hash(*source)
+    if content_hash is None and not is_signed_place_photo_source(*source, request.GET.get(PLACE_PHOTO_SIGNATURE, "")):
+        return JsonResponse({
+            "status": "error",
+            "message": "Photo URL signature is invalid."
+        }, status=status.HTTP_403_FORBIDDEN)
+
+    try:
+        content_hash = content_hash or get_place_photo_content_hash(*source)
+    except (PlaceNotFound, PlacesRequestError):
+        return JsonResponse({
+            "status": "error",
+            "message": "Photo not found"
+        }, status=status.HTTP_404_NOT_FOUND)
+    except PlacesUpstreamError:
+        return JsonResponse({
+            "status": "error",
+            "message": "Photo is not available right now. Please try again later."
+        }, status=status.HTTP_502_BAD_GATEWAY)
+
+    # variants never change once stored, so clients and CDNs may keep them forever
+    etag = get_place_photo_etag(content_hash, variant)
+    cache_control = f"public, max-age={settings.PLACE_PHOTO_MAX_AGE}, immutable"
+
+    if etag_matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(read_place_photo_variant(content_hash, variant), content_type="image/jpeg")
+
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control
+    return response
+
+@swagger_auto_schema(
+    method='get',
+    tags=['Places'],
+    operation_summary="Upstream Call Metrics",
+    operation_description="""
+    Admin only. Outbound quota usage per bucket (`google`, `openai`), connection pool reuse and circuit breaker state for this worker process.
+
+    - `granted`, `tokens`, `delayed`, `shed` and `wait_seconds` count since the process started.
+    - `tokens_available` is left in the bucket shared by every process, it refills at `capacity_per_second`.
+    - `circuit_breakers` are per call type (`nearby`, `details`, `photo`), `rejected` counts calls failed fast while open.
+    - `catalog_ingestion` counts catalog writes merged into a queued one (`coalesced`) or dropped on a full queue.
+    - `ai_guide_stages` time the stages of ai guide chat turns. Stages overlap, `turn` is the whole turn as the user waits for it.
+    """,
+)
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def upstream_metrics(request):
+
+    return Response({
+        "quota": get_upstream_quota_metrics(),
+        "connection_pools": get_connection_pool_stats(),
+        "circuit_breakers": get_circuit_breaker_stats(),
+        "catalog_ingestion": get_ingestion_stats(),
+        "ai_guide_stages": get_stage_timing_stats(),
+    }, status=status.HTTP_200_OK)
@@ -86,6 +86,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'Places.middleware.UpstreamDeadlineMiddleware',
 ]
 
 ROOT_URLCONF = 'Tourism.urls'
@@ -136,6 +137,12 @@ else:
             },
         },
     }
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": f"redis://{config('REDIS_HOST')}:{config('REDIS_PORT')}/{config('REDIS_CACHE_DB', default=1)}",
+        },
+    }
 
     DATABASES = {
         'default': {
@@ -229,6 +236,10 @@ DEFAULT_FILE_STORAGE = 'cloudinary_storage.storage.MediaCloudinaryStorage'
 
 GOOGLE_API_KEY = config('GOOGLE_API_KEY')
 
+# point both at `manage.py fake_google_places` (e.g. http://127.0.0.1:8765 and http://127.0.0.1:8765/v1) to run without google
+GOOGLE_MAPS_BASE_URL = config('GOOGLE_MAPS_BASE_URL', default='https://maps.googleapis.com').rstrip('/')
+GOOGLE_PLACES_BASE_URL = config('GOOGLE_PLACES_BASE_URL', default='https://places.googleapis.com/v1').rstrip('/')
+
 JAZZMIN_UI_TWEAKS = {
     "navbar_small_text": True,
     "footer_small_text": False,
@@ -432,4 +443,110 @@ CKEDITOR_5_CONFIGS = {
 CKEDITOR_5_FILE_UPLOAD_PERMISSION = "authenticated"
 
 DEFAULT_PLACE_CATEGORIES = config('DEFAULT_PLACE_CATEGORIES').split(',')
-MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST = config('MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST', cast=int, default=3)
\ No newline at end of file
+MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST = config('MAX_NUMBER_OF_PLACES_TO_FETCH_FOR_AI_REQUEST', cast=int, default=3)
+
+# place details cache, a short lived per-process copy in front of the shared cache
+PLACE_DETAILS_CACHE_TTL = config('PLACE_DETAILS_CACHE_TTL', cast=int, default=60 * 60 * 6)
+PLACE_DETAILS_LOCAL_CACHE_TTL = config('PLACE_DETAILS_LOCAL_CACHE_TTL', cast=int, default=60 * 5)
+PLACE_DETAILS_LOCAL_CACHE_SIZE = config('PLACE_DETAILS_LOCAL_CACHE_SIZE', cast=int, default=1024)
+PLACE_DETAILS_CACHE_STALE_TTL = config('PLACE_DETAILS_CACHE_STALE_TTL', cast=int, default=60 * 60 * 24)
+
+# feed nearby searches run concurrently, one per interest
+FEED_SEARCH_MAX_WORKERS = config('FEED_SEARCH_MAX_WORKERS', cast=int, default=8)
+FEED_SEARCH_DEADLINE = config('FEED_SEARCH_DEADLINE', cast=float, default=8.0)
+
+# longer free-text search queries are rejected, they end up in catalog keywords and search history
+SEARCH_QUERY_MAX_LENGTH = config('SEARCH_QUERY_MAX_LENGTH', cast=int, default=200)
+
+# anonymous feeds may be cached by clients and CDNs for this long, personal feeds are always revalidated by ETag
+FEED_HTTP_MAX_AGE = config('FEED_HTTP_MAX_AGE', cast=int, default=60 * 5)
+
+# pooled keep-alive http clients for google, one set per worker process
+GOOGLE_HTTP_POOL_CONNECTIONS = config('GOOGLE_HTTP_POOL_CONNECTIONS', cast=int, default=4)
+GOOGLE_HTTP_POOL_MAXSIZE = config('GOOGLE_HTTP_POOL_MAXSIZE', cast=int, default=32)
+GOOGLE_HTTP_CONNECT_TIMEOUT = config('GOOGLE_HTTP_CONNECT_TIMEOUT', cast=float, default=3.0)
+GOOGLE_HTTP_READ_TIMEOUT = config('GOOGLE_HTTP_READ_TIMEOUT', cast=float, default=10.0)
+
+# local place catalog, feed/details/saved places are answered from it while fresh
+PLACE_CATALOG_ENABLED = config('PLACE_CATALOG_ENABLED', cast=bool, default=True)
+PLACE_CATALOG_NEARBY_MAX_AGE = config('PLACE_CATALOG_NEARBY_MAX_AGE', cast=int, default=60 * 60 * 24)
+PLACE_CATALOG_DETAILS_MAX_AGE = config('PLACE_CATALOG_DETAILS_MAX_AGE', cast=int, default=60 * 60 * 24 * 3)
+# catalog writes waiting for the ingestion worker, more are dropped until it catches up
+PLACE_CATALOG_INGESTION_QUEUE_SIZE = config('PLACE_CATALOG_INGESTION_QUEUE_SIZE', cast=int, default=256)
+
+# feed snapshots per city x category, built by `manage.py warm_feed_snapshots`
+FEED_SNAPSHOTS_ENABLED = config('FEED_SNAPSHOTS_ENABLED', cast=bool, default=True)
+FEED_SNAPSHOT_MAX_AGE = config('FEED_SNAPSHOT_MAX_AGE', cast=int, default=60 * 60 * 24)
+
+# raw nearby search results, keyed by city coordinates, radius and normalized keyword
+NEARBY_SEARCH_CACHE_TTL = config('NEARBY_SEARCH_CACHE_TTL', cast=int, default=60 * 60)
+NEARBY_SEARCH_LOCAL_CACHE_TTL = config('NEARBY_SEARCH_LOCAL_CACHE_TTL', cast=int, default=60 * 5)
+NEARBY_SEARCH_LOCAL_CACHE_SIZE = config('NEARBY_SEARCH_LOCAL_CACHE_SIZE', cast=int, default=512)
+NEARBY_SEARCH_CACHE_STALE_TTL = config('NEARBY_SEARCH_CACHE_STALE_TTL', cast=int, default=60 * 60 * 6)
+
+# single-flight for identical upstream calls, one worker fetches while the others wait on the shared cache
+CACHE_LEASE_TIMEOUT = config('CACHE_LEASE_TIMEOUT', cast=float, default=10.0)
+CACHE_LEASE_POLL_INTERVAL = config('CACHE_LEASE_POLL_INTERVAL', cast=float, default=0.05)
+
+# stale-while-revalidate, expired cache entries are served while this many threads refresh them
+CACHE_REFRESH_WORKERS = config('CACHE_REFRESH_WORKERS', cast=int, default=4)
+
+# place details failures: unknown ids are negatively cached, transient errors are retried with a backoff
+PLACE_NOT_FOUND_CACHE_TTL = config('PLACE_NOT_FOUND_CACHE_TTL', cast=int, default=60 * 30)
+PLACES_TRANSIENT_RETRIES = config('PLACES_TRANSIENT_RETRIES', cast=int, default=2)
+PLACES_RETRY_BACKOFF = config('PLACES_RETRY_BACKOFF', cast=float, default=0.2)
+PLACES_RETRY_MAX_BACKOFF = config('PLACES_RETRY_MAX_BACKOFF', cast=float, default=1.0)
+
+# photo proxy, google photos are fetched once and served as resized variants from our own cache
+PLACE_PHOTO_PROXY_ENABLED = config('PLACE_PHOTO_PROXY_ENABLED', cast=bool, default=True)
+PLACE_PHOTO_PROXY_BASE_URL = config('PLACE_PHOTO_PROXY_BASE_URL', default=config('DEFAULT_API_URL')).rstrip('/')
+PLACE_PHOTO_CACHE_DIR = config('PLACE_PHOTO_CACHE_DIR', default=os.path.join(BASE_DIR, 'photo_cache'))
+PLACE_PHOTO_MAX_AGE = config('PLACE_PHOTO_MAX_AGE', cast=int, default=60 * 60 * 24 * 365)
+
+# batch place details, used by the batch endpoint, saved places and the ai guide
+PLACE_DETAILS_BATCH_MAX_SIZE = config('PLACE_DETAILS_BATCH_MAX_SIZE', cast=int, default=50)
+PLACE_DETAILS_BATCH_MAX_WORKERS = config('PLACE_DETAILS_BATCH_MAX_WORKERS', cast=int, default=8)
+PLACE_DETAILS_BATCH_DEADLINE = config('PLACE_DETAILS_BATCH_DEADLINE', cast=float, default=10.0)
+
+# saved place summaries stored on the catalog row, refreshed by `manage.py refresh_saved_places`
+SAVED_PLACE_SUMMARY_MAX_AGE = config('SAVED_PLACE_SUMMARY_MAX_AGE', cast=int, default=60 * 60 * 24 * 7)
+SAVED_PLACE_REFRESH_WORKERS = config('SAVED_PLACE_REFRESH_WORKERS', cast=int, default=4)
+
+# outbound quota shared by every service through the cache, token bucket refill rate (and size) per second per upstream
+UPSTREAM_QUOTA_PER_SECOND = {
+    "google": config('GOOGLE_QUOTA_PER_SECOND', cast=int, default=50),
+    "openai": config('OPENAI_QUOTA_PER_SECOND', cast=int, default=10),
+}
+UPSTREAM_QUOTA_MAX_WAIT = config('UPSTREAM_QUOTA_MAX_WAIT', cast=float, default=2.0)
+UPSTREAM_QUOTA_LOW_PRIORITY_SHARE = config('UPSTREAM_QUOTA_LOW_PRIORITY_SHARE', cast=float, default=0.5)
+UPSTREAM_QUOTA_LOW_PRIORITY_MAX_WAIT = config('UPSTREAM_QUOTA_LOW_PRIORITY_MAX_WAIT', cast=float, default=1.0)
+
+# per-request deadline for upstream calls, timeouts, retries and waits are cut down to what is left of it
+UPSTREAM_REQUEST_DEADLINE = config('UPSTREAM_REQUEST_DEADLINE', cast=float, default=12.0)
+UPSTREAM_MIN_CALL_BUDGET = config('UPSTREAM_MIN_CALL_BUDGET', cast=float, default=0.25)
+GOOGLE_MAPS_RETRY_TIMEOUT = config('GOOGLE_MAPS_RETRY_TIMEOUT', cast=int, default=5)
+
+# circuit breaker per upstream call type, fails fast once too many calls in the window failed
+UPSTREAM_CIRCUIT_FAILURE_RATE = config('UPSTREAM_CIRCUIT_FAILURE_RATE', cast=float, default=0.5)
+UPSTREAM_CIRCUIT_MIN_CALLS = config('UPSTREAM_CIRCUIT_MIN_CALLS', cast=int, default=10)
+UPSTREAM_CIRCUIT_WINDOW = config('UPSTREAM_CIRCUIT_WINDOW', cast=float, default=30.0)
+UPSTREAM_CIRCUIT_COOLDOWN = config('UPSTREAM_CIRCUIT_COOLDOWN', cast=float, default=15.0)
+
+# while google is failing, catalog rows up to this old are served instead of nothing
+PLACE_CATALOG_FALLBACK_MAX_AGE = config('PLACE_CATALOG_FALLBACK_MAX_AGE', cast=int, default=60 * 60 * 24 * 30)
+
+# recordings replayed (and written with --record) by `manage.py fake_google_places`
+FAKE_GOOGLE_RECORDINGS_DIR = config('FAKE_GOOGLE_RECORDINGS_DIR', default=os.path.join(BASE_DIR, 'fake_google_recordings'))
+
+# threads the async ai guide consumer runs its synchronous Feed lookups on, per process
+AI_GUIDE_FEED_WORKERS = config('AI_GUIDE_FEED_WORKERS', cast=int, default=8)
+
+# seconds the ai guide assistant's metadata is reused before it is retrieved from openai again
+OPENAI_ASSISTANT_CACHE_TTL = config('OPENAI_ASSISTANT_CACHE_TTL', cast=int, default=60 * 10)
+
+# ai guide keywords are matched locally against categories, synonyms and city names, the llm only extracts them
+# when less than this share of the message was understood
+AI_GUIDE_LOCAL_KEYWORDS_MIN_CONFIDENCE = config('AI_GUIDE_LOCAL_KEYWORDS_MIN_CONFIDENCE', cast=float, default=0.6)
+AI_GUIDE_KEYWORD_INDEX_TTL = config('AI_GUIDE_KEYWORD_INDEX_TTL', cast=int, default=60 * 10)
+AI_GUIDE_KEYWORDS_CACHE_TTL = config('AI_GUIDE_KEYWORDS_CACHE_TTL', cast=int, default=60 * 60 * 24)
+AI_GUIDE_KEYWORDS_LOCAL_CACHE_SIZE = config('AI_GUIDE_KEYWORDS_LOCAL_CACHE_SIZE', cast=int, default=1024)
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('User', '0011_usersavedplace_tag'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='usersavedplace',
+            index=models.Index(fields=['user', 'city_name'], name='saved_place_user_city_idx'),
+        ),
+    ]
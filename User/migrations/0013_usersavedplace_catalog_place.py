@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-17 16:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Places', '0004_place_primary_photo_name'),
+        ('User', '0012_usersavedplace_user_city_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='usersavedplace',
+            name='catalog_place',
+            field=models.ForeignKey(blank=True, help_text='Catalog row holding the name, address, rating and image shown in the saved places list', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='saves', to='Places.place'),
+        ),
+    ]
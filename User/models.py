@@ -131,8 +131,14 @@ class UserSavedPlace(models.Model):
     tag = models.CharField(max_length=100, null=True, blank=True)
     city_name = models.CharField(max_length=255)
     place_id = models.CharField(max_length=255)
+    catalog_place = models.ForeignKey('Places.Place', on_delete=models.SET_NULL, null=True, blank=True, related_name='saves', help_text="Catalog row holding the name, address, rating and image shown in the saved places list")
     date = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'city_name'], name='saved_place_user_city_idx'),
+        ]
+
 class UserSearchHistory(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='search_history')
@@ -14,8 +14,10 @@ from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from .utils import is_valid_email, authenticate_credentials, is_valid_phone_number, send_activation_email
 from .serializers import UserSerializer, CategorySerializer, UserSearchHistorySerializer
 from django.utils.crypto import get_random_string
-from Places.models import City
+from Places.models import City, Place
 from Places.utils import Feed
+from Places.catalog import submit_ingestion
+from Places.refresh import refresh_place_summaries
 
 @swagger_auto_schema(
     method='post',
@@ -1279,6 +1281,15 @@ def save_place(request, city_id):
         tag=tag
     )
     if created:
+
+        # link the save to its catalog row and fill the summary shown in the saved places list
+        catalog_place, _ = Place.objects.get_or_create(place_id=place_id, defaults={"city_name": city.name})
+        user_saved_place.catalog_place = catalog_place
+        user_saved_place.save(update_fields=['catalog_place'])
+
+        if catalog_place.summary_refreshed_at is None:
+            submit_ingestion(("summary", place_id), refresh_place_summaries, [place_id])
+
         return Response({
             "status": "success",
             "message": "Place saved successfully"
@@ -1457,22 +1468,17 @@ def get_user_saved_places(request, city_id):
         }, status=status.HTTP_404_NOT_FOUND)
     
     user = request.user
-    saved_places = UserSavedPlace.objects.filter(user=user)
+    saved_places = list(
+        UserSavedPlace.objects.filter(user=user, city_name=city.name)
+        .select_related('catalog_place')
+        .order_by('id')
+    )
 
-    if saved_places.exists():
+    if saved_places:
 
-        user_saved_places = []
+        # served from the catalog summaries, only stale or unknown places are fetched (concurrently)
+        user_saved_places = Feed().get_saved_places_details(saved_places, city_name=city.name)
 
-        for saved_place in saved_places:
-            get_place_by_place_id = Feed().get_place_details(
-                place_id=saved_place.place_id,
-                city_name = city.name,
-                is_saved_place_request=True,
-                tag=saved_place.tag,
-            )
-            if get_place_by_place_id:
-                user_saved_places.append(get_place_by_place_id)
-    
         return Response(user_saved_places, status=status.HTTP_200_OK)
     
     return Response([], status=status.HTTP_200_OK)